@@ -1,10 +1,18 @@
 import streamlit as st
-import pandas as pd
-import joblib
 import plotly.graph_objects as go
 import plotly.express as px
-import time
 import numpy as np
+from dataset import dataset_fingerprint, default_data_path, list_columns, load_dataset
+from schema import FEATURE_COLUMNS, ID_COLUMN, NAME_COLUMN, TARGET
+from customer_names import load_customer_names
+from customer_index import CustomerIndex
+from churn_cube import build_cube
+from lookalike import load_or_build as load_lookalikes
+from attributions import Explainer, background_sample
+import scoring
+from scoring import ModelWatcher, compile_scorer, risk_tier
+from prediction_cache import CachedScorer, PredictionCache
+from score_store import ScoreStore
 
 # Set page config
 st.set_page_config(
@@ -15,62 +23,103 @@ st.set_page_config(
 )
 
 
-# Load data
+# Every feature is loaded, not just the ones the form shows, so a known
+# customer is scored, explained and matched on their full record
+APP_COLUMNS = [ID_COLUMN] + FEATURE_COLUMNS + [TARGET]
+
+
+# Load data. The fingerprint is only a cache key, so the frame is reloaded
+# whenever the dataset file changes, together with the cube below.
 @st.cache_data
-def load_data():
-    return pd.read_csv('data/telecom_churn.csv')
+def load_data(path, fingerprint):
+    # Names are read from the dataset (or its precomputed sidecar file)
+    # instead of being generated on every startup
+    columns = APP_COLUMNS
+    if NAME_COLUMN in list_columns(path):
+        columns = columns + [NAME_COLUMN]
+    df = load_dataset(path, columns=columns)
+    df[NAME_COLUMN] = load_customer_names(path, df)
+    return df
+
+
+# Display label and colour for each risk tier from scoring.RISK_TIERS
+RISK_STYLES = {
+    'CRITICAL': ("🔴 CRITICAL", "#ff6b6b"),
+    'HIGH': ("🟠 HIGH", "#ffa500"),
+    'MEDIUM': ("🟡 MEDIUM", "#ffb800"),
+    'LOW': ("🟢 LOW", "#51cf66"),
+}
+
+
+# Everything the dashboard needs from one model version: the single-record
+# fast path behind an LRU cache, the precomputed scores for the customers
+# in the dataset (None when the store is missing or was built by another
+# model, in which case everyone is scored live), and the explainer behind
+# the risk drivers
+def load_serving(path):
+    model = scoring.load_model(path)
+    version = scoring.model_version(path)
+    return {
+        'path': path,
+        'version': version,
+        'scorer': CachedScorer(compile_scorer(model), PredictionCache()),
+        'score_store': ScoreStore.load(version=version),
+        'explainer': Explainer.from_model(model, background_sample(default_data_path())),
+    }
 
 
+# Shared by every session of this server process. Activating another
+# registry version swaps the bundle on the next rerun; sessions in the
+# middle of a rerun finish it with the bundle they already hold.
 @st.cache_resource
-def load_model():
+def load_model_watcher():
+    return ModelWatcher(load_serving)
+
+
+def current_serving():
     try:
-        return joblib.load('models/best_churn_model.pkl')
+        return load_model_watcher().current()
     except FileNotFoundError:
         st.error("❌ Model file not found.")
         st.stop()
+    except Exception as e:
+        # Only the first load can fail here; later reloads keep the old model
+        st.error(f"❌ Could not load the model: {e}")
+        st.stop()
 
 
-# Generate realistic names
-@st.cache_data
-def generate_customer_names(df):
-    first_names_male = [
-        'Rajesh', 'Amit', 'Arjun', 'Vikram', 'Rohit', 'Akshay',
-        'Sanjay', 'Pradeep', 'Nikhil', 'Arun', 'Varun', 'Karthik',
-        'Mahesh', 'Suresh', 'Bhaskar', 'Deepak', 'Ashok', 'Ravi',
-        'Kumar', 'Jitesh', 'Manish', 'Naveen', 'Sachin', 'Rahul'
-    ]
-    first_names_female = [
-        'Priya', 'Anjali', 'Neha', 'Divya', 'Shreya', 'Pooja',
-        'Isha', 'Megha', 'Sneha', 'Ananya', 'Riya', 'Kavya',
-        'Simran', 'Nikita', 'Geeta', 'Aarti', 'Rani', 'Sunita',
-        'Meera', 'Lata', 'Kalpana', 'Swati', 'Vidya', 'Seema'
-    ]
-    last_names = [
-        'Sharma', 'Singh', 'Kumar', 'Patel', 'Gupta', 'Verma',
-        'Reddy', 'Rao', 'Pillai', 'Nair', 'Desai', 'Kapoor',
-        'Joshi', 'Iyer', 'Menon', 'Bhat', 'Das', 'Roy', 'Khan',
-        'Ahmed', 'Chopra', 'Malhotra', 'Bansal', 'Saxena', 'Tiwari',
-        'Mishra', 'Pandey'
-    ]
-
-    names = []
-    np.random.seed(42)
-    for idx, row in df.iterrows():
-        gender = row['gender']
-        if gender == 'Male':
-            first = np.random.choice(first_names_male)
-        else:
-            first = np.random.choice(first_names_female)
-        last = np.random.choice(last_names)
-        names.append(f"{first} {last}")
+# Built once per dataset version; the leading underscore tells Streamlit
+# not to hash the whole frame on every rerun
+@st.cache_resource
+def load_customer_index(_df, fingerprint):
+    return CustomerIndex.from_frame(_df)
+
+
+# Counts, churn and charge sums by tenure x contract x internet x payment,
+# shared by every session and rebuilt only when the dataset file changes.
+# The statistics panels below are lookups into it, not scans of df.
+@st.cache_resource
+def load_churn_cube(path, fingerprint):
+    return build_cube(path)
+
 
-    return names
+# Nearest customers on standardized numerics and one-hot categoricals,
+# whatever the model. Persisted under models/lookalike and rebuilt when the
+# dataset changes; the fingerprint is there so Streamlit does the same.
+@st.cache_resource
+def load_lookalike_index(data_path, fingerprint):
+    return load_lookalikes(data_path)
 
 
 # Load data and model
-df = load_data()
-df['CustomerName'] = generate_customer_names(df)
-model = load_model()
+data_path = default_data_path()
+data_fingerprint = dataset_fingerprint(data_path)
+df = load_data(data_path, data_fingerprint)
+customer_index = load_customer_index(df, data_fingerprint)
+cube = load_churn_cube(data_path, data_fingerprint)
+serving = current_serving()
+scorer = serving['scorer']
+score_store = serving['score_store']
 
 # Theme configuration
 THEMES = {
@@ -131,6 +180,13 @@ with st.sidebar:
         help="Select your preferred dashboard theme"
     )
 
+    cache_stats = scorer.cache.stats()
+    st.caption(
+        f"⚡ Prediction cache: {cache_stats['hits']} hits, "
+        f"{cache_stats['misses']} misses"
+    )
+    st.caption(f"🧠 Model version: {serving['version']}")
+
 theme_colors = THEMES[selected_theme]
 
 # Custom CSS for stunning separated styling
@@ -361,12 +417,13 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Calculate statistics from actual data
-total_customers = len(df)
-churn_count = len(df[df['Churn'] == 'Yes'])
+overall = cube.totals()
+total_customers = int(overall['customers'])
+churn_count = int(overall['churned'])
 churn_rate = (churn_count / total_customers) * 100
-avg_tenure = df['tenure'].mean()
-avg_monthly_charges = df['MonthlyCharges'].mean()
-total_revenue = df['MonthlyCharges'].sum()
+avg_tenure = cube.mean_tenure()
+avg_monthly_charges = overall['monthly_charges'] / total_customers
+total_revenue = overall['monthly_charges']
 
 # Main layout - Left sidebar for input, Right for display
 left_col, right_col = st.columns([2.5, 1.2])
@@ -376,20 +433,27 @@ with right_col:
     
     # Search for existing customer
     st.markdown("**🔍 Search Customer**")
-    customer_search = st.selectbox(
+    search_query = st.text_input(
         "Find & Auto-fill Customer Data",
-        ["Manual Entry"] + sorted(df['CustomerName'].unique().tolist()),
+        placeholder="Type a name or customer ID",
+        help="Matches the start of a customer's name or ID"
+    )
+    matches = customer_index.search(search_query)
+    # Keyed on the row, since customers can share a name and even an ID
+    match_labels = {row: label for label, row in matches}
+    selected_row = st.selectbox(
+        "Matching customers",
+        [None] + list(match_labels),
+        format_func=lambda row: "Manual Entry" if row is None else match_labels[row],
         help="Select a customer to auto-populate their data"
     )
-    
+
     selected_customer_data = None
-    if customer_search != "Manual Entry":
-        selected_customer_data = (
-            df[df['CustomerName'] == customer_search].iloc[0]
-        )
-        msg = f"✅ Found: {customer_search} (ID: "
-        msg += f"{selected_customer_data['customerID']})"
-        st.success(msg)
+    if selected_row is not None:
+        selected_customer_data = df.iloc[selected_row]
+        st.success(f"✅ Found: {match_labels[selected_row]}")
+    elif search_query and not matches:
+        st.info("No matching customers")
 
     with st.form("churn_form"):
         # Demographics
@@ -617,13 +681,35 @@ with left_col:
             'MonthlyCharges': monthly_charges,
             'TotalCharges': total_charges
         }
-        input_df = pd.DataFrame(data, index=[0])
-
-        with st.spinner('🔄 Analyzing...'):
-            time.sleep(0.5)
-            prediction = model.predict(input_df)
-            prediction_proba = model.predict_proba(input_df)
-            churn_prob = prediction_proba[0][1]
+        # A known customer whose fields were left as loaded is read from the
+        # score store; manual entries and edited fields are scored live
+        stored = None
+        if selected_customer_data is not None and score_store is not None:
+            unedited = (
+                gender == selected_customer_data['gender']
+                and senior_citizen == int(selected_customer_data['SeniorCitizen'])
+                and partner == selected_customer_data['Partner']
+                and phone_service == selected_customer_data['PhoneService']
+                and internet_service == selected_customer_data['InternetService']
+                and contract == selected_customer_data['Contract']
+                and tenure == int(selected_customer_data['tenure'])
+                and monthly_charges == float(selected_customer_data['MonthlyCharges'])
+                and total_charges == float(selected_customer_data['TotalCharges'])
+            )
+            if unedited:
+                stored = score_store.get(selected_customer_data['customerID'])
+        if stored is not None:
+            churn_prob = stored[0]
+            # The store scored the customer's full record, including the
+            # fields the form fills with defaults; the drivers and lookalikes
+            # below describe that same record
+            data = {
+                col: value.item() if hasattr(value, 'item') else value
+                for col, value in selected_customer_data[FEATURE_COLUMNS].items()
+            }
+        else:
+            with st.spinner('🔄 Analyzing...'):
+                prediction, churn_prob = scorer.score(data)
 
         # Customer Profile Section
         st.markdown("<div class='section-title'>👤 Customer Profile</div>",
@@ -698,18 +784,7 @@ with left_col:
 
         with analysis_col2:
             # Risk Status
-            if churn_prob > 0.65:
-                risk_level = "🔴 CRITICAL"
-                risk_color = "#ff6b6b"
-            elif churn_prob > 0.40:
-                risk_level = "🟠 HIGH"
-                risk_color = "#ffa500"
-            elif churn_prob > 0.25:
-                risk_level = "🟡 MEDIUM"
-                risk_color = "#ffb800"
-            else:
-                risk_level = "🟢 LOW"
-                risk_color = "#51cf66"
+            risk_level, risk_color = RISK_STYLES[risk_tier(churn_prob)]
 
             st.markdown(f"""
             <div class='card'>
@@ -730,14 +805,13 @@ with left_col:
 
         col_compare1, col_compare2, col_compare3 = st.columns(3)
 
-        similar_tenure = df[
-            df['tenure'].between(max(0, tenure-6), tenure+6)
-        ]
-        similar_contract = df[df['Contract'] == contract]
+        similar_tenure = cube.totals(tenure=(max(0, tenure-6), tenure+6))
+        similar_contract = cube.totals(Contract=contract)
 
         with col_compare1:
             avg_similar_monthly = (
-                similar_tenure['MonthlyCharges'].mean()
+                similar_tenure['monthly_charges'] / similar_tenure['customers']
+                if similar_tenure['customers'] else float('nan')
             )
             st.markdown(f"""
             <div class='card'>
@@ -754,13 +828,10 @@ with left_col:
             """, unsafe_allow_html=True)
 
         with col_compare2:
-            if len(similar_contract) > 0:
-                churn_similar = similar_contract[
-                    similar_contract['Churn'] == 'Yes'
-                ]
+            if similar_contract['customers'] > 0:
                 contract_churn_rate = (
-                    (len(churn_similar) /
-                     len(similar_contract)) * 100
+                    (similar_contract['churned'] /
+                     similar_contract['customers']) * 100
                 )
             else:
                 contract_churn_rate = 0
@@ -786,6 +857,24 @@ with left_col:
             </div>
             """, unsafe_allow_html=True)
 
+        # Lookalike customers: nearest neighbours of the form's values, with
+        # what actually happened to them
+        with st.spinner('🔄 Finding similar customers...'):
+            lookalikes = load_lookalike_index(data_path, data_fingerprint)
+        if len(lookalikes) == len(df):
+            rows, distances = lookalikes.query(data, k=10, exclude=selected_row)
+            similar = df.iloc[rows][[
+                'customerID', NAME_COLUMN, 'tenure', 'Contract',
+                'InternetService', 'MonthlyCharges', 'Churn'
+            ]].assign(Distance=distances.round(3))
+            churned_similar = int((similar['Churn'] == 'Yes').sum())
+            st.markdown(
+                f"<div class='section-title'>👥 Similar Customers — "
+                f"{churned_similar} of {len(similar)} churned</div>",
+                unsafe_allow_html=True
+            )
+            st.dataframe(similar, hide_index=True, use_container_width=True)
+
         # Recommendations
         if churn_prob > 0.50:
             st.markdown("""
@@ -824,45 +913,27 @@ with left_col:
             unsafe_allow_html=True
         )
 
+        # The model's own per-feature contributions for this customer:
+        # positive ones push towards churn, negative ones hold them back
+        explainer = serving['explainer']
         factors = []
-        if contract == "Month-to-month":
-            factors.append((
-                "⚠️ Month-to-Month Contract",
-                "High flexibility = Higher risk",
-                30
-            ))
-        if internet_service == "Fiber optic":
-            factors.append((
-                "⚠️ Fiber Optic Service",
-                "Service quality concerns",
-                20
-            ))
-        if tenure < 12:
-            factors.append((
-                "⚠️ New Customer",
-                "Early tenure = Early churn window",
-                25
-            ))
-        if monthly_charges > 100:
-            factors.append((
-                "⚠️ Premium Pricing",
-                "Above-average charges",
-                15
-            ))
-        if tech_support == "No":
-            factors.append((
-                "⚠️ No Tech Support",
-                "Increased frustration risk",
-                10
-            ))
-        if (streaming_tv == "No" and
-                streaming_movies == "No" and
-                internet_service != "No"):
-            factors.append((
-                "ℹ️ Limited Services",
-                "Opportunity to upsell",
-                -5
-            ))
+        for feature, contribution in explainer.explain_record(data)[:5]:
+            if abs(contribution) < 1e-3:
+                continue
+            value = data[feature]
+            value = f"{value:.2f}" if isinstance(value, float) else value
+            if contribution > 0:
+                factors.append((
+                    f"⚠️ {feature}: {value}",
+                    f"Raises churn risk ({contribution:+.2f} {explainer.units})",
+                    contribution
+                ))
+            else:
+                factors.append((
+                    f"✅ {feature}: {value}",
+                    f"Lowers churn risk ({contribution:+.2f} {explainer.units})",
+                    contribution
+                ))
 
         if factors:
             factor_col1, factor_col2 = st.columns([2, 1])
@@ -891,7 +962,7 @@ with left_col:
         chart_col1, chart_col2 = st.columns(2)
 
         with chart_col1:
-            churn_by_contract = df['Contract'].value_counts()
+            churn_by_contract = cube.counts_by('Contract')
             fig1_data = [
                 go.Bar(
                     x=churn_by_contract.index,
@@ -908,7 +979,7 @@ with left_col:
             st.plotly_chart(fig1, use_container_width=True)
 
         with chart_col2:
-            churn_dist = df['Churn'].value_counts()
+            churn_dist = cube.churn_counts()
             colors = ['#1e40af', '#dc2626']
             fig2_data = [
                 go.Pie(
@@ -956,8 +1027,7 @@ with left_col:
         stat_col1, stat_col2, stat_col3 = st.columns(3)
 
         with stat_col1:
-            contract_data = df['Contract'].value_counts()
-            contract_data = df['Contract'].value_counts()
+            contract_data = cube.counts_by('Contract')
             fig = px.pie(
                 values=contract_data.values,
                 names=contract_data.index,
@@ -967,7 +1037,7 @@ with left_col:
             st.plotly_chart(fig, use_container_width=True)
 
         with stat_col2:
-            internet_data = df['InternetService'].value_counts()
+            internet_data = cube.counts_by('InternetService')
             fig = px.bar(
                 x=internet_data.index,
                 y=internet_data.values,
@@ -981,13 +1051,18 @@ with left_col:
             st.plotly_chart(fig, use_container_width=True)
 
         with stat_col3:
-            fig = px.histogram(
-                df,
-                x='MonthlyCharges',
-                nbins=30,
+            counts, edges = cube.monthly_charges.binned(30)
+            fig = px.bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=counts,
                 title="Monthly Charges Distribution"
             )
-            fig.update_layout(height=300)
+            fig.update_layout(
+                height=300,
+                bargap=0,
+                xaxis_title="MonthlyCharges",
+                yaxis_title="count"
+            )
             st.plotly_chart(fig, use_container_width=True)
 
 # Footer
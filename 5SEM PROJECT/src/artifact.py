@@ -0,0 +1,241 @@
+import numpy as np
+import hashlib
+import json
+import os
+import shutil
+import time
+import joblib
+import sklearn
+from scipy.special import expit
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from schema import CATEGORICAL_FEATURES, CATEGORIES, FEATURE_COLUMNS, NUMERIC_DTYPES, NUMERICAL_FEATURES, TARGET
+
+# Versioned model artifact: a directory instead of a single pickle.
+#
+#   metadata.json      format version, model version, feature schema, class
+#                      mapping, training metrics and the training data hash
+#   pipeline.joblib    the full fitted Pipeline, uncompressed so its numpy
+#                      arrays can be memory-mapped on load
+#   preprocessor.joblib  the fitted preprocessing stage on its own (small)
+#   arrays/*.npy       the classifier's parameters as flat arrays: the
+#                      coefficients, or every tree's nodes stacked together
+#
+# sklearn's Tree copies its node arrays into private memory when unpickled,
+# so memory-mapping pipeline.joblib cannot share a forest between processes.
+# CompiledModel instead scores straight from the memory-mapped .npy files:
+# N workers then share one copy through the page cache, and loading costs
+# little more than reading metadata.json.
+
+FORMAT_VERSION = 1
+METADATA_FILE = 'metadata.json'
+PIPELINE_FILE = 'pipeline.joblib'
+PREPROCESSOR_FILE = 'preprocessor.joblib'
+ARRAYS_DIR = 'arrays'
+
+def is_artifact(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, METADATA_FILE))
+
+def read_metadata(path):
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    if metadata.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"unsupported model artifact format {metadata.get('format_version')} in {path}")
+    return metadata
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+def _stack_trees(trees, value_column):
+    # One set of node arrays for the whole ensemble. children[2 * node] and
+    # children[2 * node + 1] are the global left and right child; leaves
+    # point at themselves so a fixed number of descent steps leaves every
+    # row on its leaf.
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    feature, threshold, children, value = [], [], [], []
+    for tree, offset in zip(trees, offsets):
+        is_leaf = tree.children_left == -1
+        nodes = np.arange(tree.node_count) + offset
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        children.append(np.column_stack([
+            np.where(is_leaf, nodes, tree.children_left + offset),
+            np.where(is_leaf, nodes, tree.children_right + offset),
+        ]).ravel())
+        value.append(tree.value[:, 0, value_column])
+    arrays = {
+        'roots': offsets[:-1].astype(np.int64),
+        'feature': np.concatenate(feature).astype(np.int64),
+        'threshold': np.concatenate(threshold),
+        'children': np.concatenate(children).astype(np.int64),
+        'value': np.concatenate(value),
+    }
+    return arrays, int(max(tree.max_depth for tree in trees))
+
+def export_classifier(classifier, n_features):
+    # (arrays, params) describing the classifier for CompiledModel, or
+    # (None, None) when it has no array form
+    if isinstance(classifier, LogisticRegression) and len(classifier.classes_) == 2:
+        arrays = {'coef': classifier.coef_.T.copy(), 'intercept': classifier.intercept_.copy()}
+        return arrays, {'kind': 'logistic'}
+    if (isinstance(classifier, GradientBoostingClassifier) and classifier.n_trees_per_iteration_ == 1
+            and classifier.init in (None, 'zero')):
+        trees = [tree.tree_ for tree in classifier.estimators_[:, 0]]
+        arrays, max_depth = _stack_trees(trees, 0)
+        init_raw = float(classifier._raw_predict_init(np.zeros((1, n_features)))[0, 0])
+        return arrays, {'kind': 'gradient_boosting', 'max_depth': max_depth,
+                        'learning_rate': float(classifier.learning_rate), 'init_raw': init_raw}
+    if isinstance(classifier, RandomForestClassifier) and len(classifier.classes_) == 2:
+        trees = [tree.tree_ for tree in classifier.estimators_]
+        arrays, max_depth = _stack_trees(trees, slice(None))
+        return arrays, {'kind': 'random_forest', 'max_depth': max_depth}
+    return None, None
+
+class CompiledModel:
+    # predict_proba over the memory-mapped classifier arrays, after the
+    # pipeline's own fitted preprocessor. Matches the sklearn classifiers
+    # exactly: trees see float32 inputs and ensembles accumulate tree by
+    # tree in the same order.
+
+    def __init__(self, preprocessor, arrays, params, classes):
+        self.preprocessor = preprocessor
+        self.arrays = arrays
+        self.params = params
+        self.classes_ = np.asarray(classes)
+
+    def _leaves(self, X):
+        # (rows, trees) leaf indices; X is the encoded float32 matrix. Rows
+        # go left when x <= threshold, as in sklearn.
+        a = self.arrays
+        flat = X.ravel()
+        row_base = (np.arange(X.shape[0]) * X.shape[1])[:, None]
+        node = np.broadcast_to(a['roots'], (X.shape[0], len(a['roots'])))
+        for _ in range(self.params['max_depth']):
+            x = flat.take(row_base + a['feature'].take(node))
+            go_right = ~(x <= a['threshold'].take(node))
+            node = a['children'].take(2 * node + go_right)
+        return node
+
+    def _churn_proba(self, X):
+        kind = self.params['kind']
+        if kind == 'logistic':
+            return expit((X @ self.arrays['coef']).ravel() + self.arrays['intercept'])
+        X = np.ascontiguousarray(X.toarray() if hasattr(X, 'toarray') else X, dtype=np.float32)
+        leaves = self._leaves(X)
+        if kind == 'gradient_boosting':
+            raw = np.full(X.shape[0], self.params['init_raw'])
+            scale = self.params['learning_rate']
+            value = self.arrays['value']
+            for t in range(leaves.shape[1]):
+                raw += scale * value[leaves[:, t]]
+            return expit(raw)
+        # random_forest: average the per-tree class fractions
+        value = self.arrays['value']
+        total = np.zeros((X.shape[0], value.shape[1]))
+        for t in range(leaves.shape[1]):
+            total += value[leaves[:, t]]
+        total /= leaves.shape[1]
+        return total
+
+    def predict_proba(self, X, batch_size=50_000):
+        X = self.preprocessor.transform(X)
+        parts = []
+        for start in range(0, X.shape[0], batch_size):
+            churn = self._churn_proba(X[start:start + batch_size])
+            parts.append(churn if churn.ndim == 2 else np.column_stack([1 - churn, churn]))
+        return np.vstack(parts) if parts else np.empty((0, len(self.classes_)))
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+def save_artifact(pipeline, path, metrics=None, data_hash=None, target_classes=None):
+    # Written into a temporary directory and swapped in at the end, so a
+    # reader never sees a half-written artifact
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_path, ARRAYS_DIR))
+
+    joblib.dump(pipeline, os.path.join(tmp_path, PIPELINE_FILE))
+    preprocessor = pipeline.named_steps['preprocessor']
+    joblib.dump(preprocessor, os.path.join(tmp_path, PREPROCESSOR_FILE))
+
+    classifier = pipeline.named_steps['classifier']
+    n_features = len(preprocessor.get_feature_names_out())
+    arrays, params = export_classifier(classifier, n_features)
+    for name, array in (arrays or {}).items():
+        np.save(os.path.join(tmp_path, ARRAYS_DIR, f"{name}.npy"), np.ascontiguousarray(array))
+
+    metadata = {
+        'format_version': FORMAT_VERSION,
+        'model_version': file_hash(os.path.join(tmp_path, PIPELINE_FILE)),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'sklearn_version': sklearn.__version__,
+        'classifier': type(classifier).__name__,
+        'schema': {
+            'features': FEATURE_COLUMNS,
+            'numerical': NUMERICAL_FEATURES,
+            'categorical': CATEGORICAL_FEATURES,
+            'numeric_dtypes': {col: str(np.dtype(NUMERIC_DTYPES[col])) for col in NUMERICAL_FEATURES},
+            'categories': {col: CATEGORIES[col] for col in CATEGORICAL_FEATURES},
+        },
+        'target': {
+            'column': TARGET,
+            # classes_ holds encoded labels; target_classes[i] is what i stands for
+            'classes': [int(c) for c in pipeline.classes_],
+            'labels': [str(c) for c in target_classes] if target_classes is not None else None,
+        },
+        'metrics': metrics or {},
+        'data_hash': data_hash,
+        'compiled': params,
+    }
+    with open(os.path.join(tmp_path, METADATA_FILE), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return metadata
+
+class ModelArtifact:
+    # Loaded artifact; the pipeline is only unpickled when first asked for
+
+    def __init__(self, path, mmap_mode='r'):
+        self.path = path
+        self.mmap_mode = mmap_mode
+        self.metadata = read_metadata(path)
+        self.version = self.metadata['model_version']
+        self._pipeline = None
+        self._model = None
+
+    @property
+    def pipeline(self):
+        if self._pipeline is None:
+            self._pipeline = joblib.load(os.path.join(self.path, PIPELINE_FILE), mmap_mode=self.mmap_mode)
+        return self._pipeline
+
+    @property
+    def model(self):
+        # Batch scoring model: CompiledModel when the classifier has an array
+        # form, otherwise the pipeline itself
+        if self._model is None:
+            params = self.metadata.get('compiled')
+            if params is None:
+                self._model = self.pipeline
+            else:
+                arrays_dir = os.path.join(self.path, ARRAYS_DIR)
+                arrays = {
+                    name[:-len('.npy')]: np.load(os.path.join(arrays_dir, name), mmap_mode=self.mmap_mode)
+                    for name in os.listdir(arrays_dir) if name.endswith('.npy')
+                }
+                preprocessor = joblib.load(os.path.join(self.path, PREPROCESSOR_FILE))
+                self._model = CompiledModel(preprocessor, arrays, params, self.metadata['target']['classes'])
+        return self._model
+
+def load_artifact(path, mmap_mode='r'):
+    return ModelArtifact(path, mmap_mode)
@@ -0,0 +1,178 @@
+import pandas as pd
+import numpy as np
+from scipy.special import logit
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder
+from artifact import CompiledModel, export_classifier
+from dataset import iter_dataset
+from schema import CATEGORIES, FEATURE_COLUMNS, apply_schema, records_to_frame
+from scoring import unwrap_transformer
+
+# Per-customer feature contributions from the fitted model, computed for a
+# whole batch at once and summed back from encoded columns to the 19 input
+# features (a one-hot group counts as its source column):
+#
+#   linear models   exact: coef * (x - mean) on the encoded features, in
+#                   log-odds, against the mean encoded background customer
+#   tree ensembles  path-based (Saabas): walking each tree from the root,
+#                   every split credits its feature with the change in node
+#                   value. Uses the same stacked node arrays as
+#                   CompiledModel; log-odds for gradient boosting, churn
+#                   probability for random forests
+#   anything else   occlusion: the change in log-odds when one feature is
+#                   replaced by its background value (median or mode)
+#
+# For the first two, bias + contributions.sum(axis=1) is exactly the model's
+# raw output for each row.
+
+BACKGROUND_ROWS = 10_000
+
+def background_sample(data_path, rows=BACKGROUND_ROWS):
+    # The first rows of a dataset, as the reference customers
+    return next(iter_dataset(data_path, columns=FEATURE_COLUMNS, chunk_size=rows))
+
+def encoded_sources(preprocessor):
+    # Index into FEATURE_COLUMNS of the input column behind every encoded column
+    if not isinstance(preprocessor, ColumnTransformer):
+        raise ValueError(f"attributions need a ColumnTransformer, not {type(preprocessor).__name__}")
+    sources = np.full(len(preprocessor.get_feature_names_out()), -1)
+    for name, transformer, columns in preprocessor.transformers_:
+        if name == 'remainder' or transformer == 'drop':
+            continue
+        positions = [FEATURE_COLUMNS.index(col) for col in columns]
+        out = preprocessor.output_indices_[name]
+        transformer = unwrap_transformer(transformer)
+        if isinstance(transformer, OneHotEncoder):
+            if transformer.drop_idx_ is not None or getattr(transformer, 'infrequent_categories_', None) is not None:
+                raise ValueError("attributions do not support dropped or infrequent one-hot categories")
+            widths = [len(categories) for categories in transformer.categories_]
+            sources[out] = np.repeat(positions, widths)
+        elif out.stop - out.start == len(positions):
+            sources[out] = positions
+        else:
+            raise ValueError(f"cannot map the outputs of {type(transformer).__name__} back to input columns")
+    if (sources < 0).any():
+        raise ValueError("some encoded columns have no input column")
+    return sources
+
+def _dense(X):
+    return np.asarray(X.toarray() if hasattr(X, 'toarray') else X, dtype=np.float64)
+
+class Explainer:
+    def __init__(self, preprocessor, classes, background, arrays=None, params=None, predict_proba=None):
+        # arrays/params as export_classifier returns them; predict_proba is
+        # only used (for occlusion) when the classifier has no array form
+        self.preprocessor = preprocessor
+        self.arrays = arrays
+        self.params = params
+        self.predict_proba = predict_proba
+        self.churn_idx = list(classes).index(1)
+        self.features = list(FEATURE_COLUMNS)
+        self.sources = encoded_sources(preprocessor)
+        self.method = 'occlusion' if params is None else params['kind']
+        self.units = 'probability' if self.method == 'random_forest' else 'log-odds'
+
+        background = apply_schema(background[FEATURE_COLUMNS])
+        self.background_mean = _dense(preprocessor.transform(background)).mean(axis=0)
+        self.reference = {
+            col: background[col].mode().iloc[0] if col in CATEGORIES else background[col].median()
+            for col in FEATURE_COLUMNS
+        }
+
+    @classmethod
+    def from_model(cls, model, background):
+        # model: a fitted Pipeline or a CompiledModel
+        if isinstance(model, CompiledModel):
+            return cls(model.preprocessor, model.classes_, background, model.arrays, model.params)
+        preprocessor = model.named_steps['preprocessor']
+        classifier = model.named_steps['classifier']
+        arrays, params = export_classifier(classifier, len(preprocessor.get_feature_names_out()))
+        if params is None and hasattr(classifier, 'coef_') and classifier.coef_.shape[0] == 1:
+            # Any other binary linear model (e.g. the out-of-core SGD one)
+            arrays = {'coef': classifier.coef_.T.copy(), 'intercept': np.atleast_1d(classifier.intercept_).copy()}
+            params = {'kind': 'logistic'}
+        return cls(preprocessor, model.classes_, background, arrays, params,
+                   None if params else model.predict_proba)
+
+    def explain(self, X, batch_size=50_000):
+        # (contributions, bias): an (n_rows, n_features) array in self.units
+        # and the per-row baseline they are measured from
+        parts = [self._explain(X.iloc[start:start + batch_size]) for start in range(0, len(X), batch_size)]
+        if not parts:
+            return np.empty((0, len(self.features))), np.empty(0)
+        return np.vstack([c for c, _ in parts]), np.concatenate([b for _, b in parts])
+
+    def _explain(self, X):
+        if self.method == 'occlusion':
+            return self._occlusion(X)
+        encoded = _dense(self.preprocessor.transform(X[FEATURE_COLUMNS]))
+        if self.method == 'logistic':
+            coef = np.asarray(self.arrays['coef']).ravel()
+            by_column = (encoded - self.background_mean) * coef
+            bias = float(self.arrays['intercept'][0]) + float(self.background_mean @ coef)
+            return self._to_features(by_column), np.full(len(X), bias)
+        return self._saabas(np.ascontiguousarray(encoded, dtype=np.float32))
+
+    def _to_features(self, by_column):
+        grouped = np.zeros((by_column.shape[1], len(self.features)))
+        grouped[np.arange(by_column.shape[1]), self.sources] = 1
+        return by_column @ grouped
+
+    def _saabas(self, X):
+        # Same descent as CompiledModel._leaves, crediting each split's
+        # feature with value[child] - value[node]; leaves loop onto
+        # themselves and add nothing
+        a = self.arrays
+        value = a['value'] if a['value'].ndim == 1 else a['value'][:, self.churn_idx]
+        n_rows, n_trees = X.shape[0], len(a['roots'])
+        flat = X.ravel()
+        row_base = (np.arange(n_rows) * X.shape[1])[:, None]
+        feature_base = (np.arange(n_rows) * len(self.features))[:, None]
+        contributions = np.zeros(n_rows * len(self.features))
+        node = np.broadcast_to(a['roots'], (n_rows, n_trees))
+        for _ in range(self.params['max_depth']):
+            feature = a['feature'].take(node)
+            go_right = ~(flat.take(row_base + feature) <= a['threshold'].take(node))
+            child = a['children'].take(2 * node + go_right)
+            contributions += np.bincount((feature_base + self.sources.take(feature)).ravel(),
+                                         weights=(value.take(child) - value.take(node)).ravel(),
+                                         minlength=len(contributions))
+            node = child
+        contributions = contributions.reshape(n_rows, len(self.features))
+        root_total = float(value.take(a['roots']).sum())
+        if self.method == 'gradient_boosting':
+            scale = self.params['learning_rate']
+            return contributions * scale, np.full(n_rows, self.params['init_raw'] + scale * root_total)
+        return contributions / n_trees, np.full(n_rows, root_total / n_trees)
+
+    def _log_odds(self, X):
+        proba = self.predict_proba(X)[:, self.churn_idx]
+        return logit(np.clip(proba, 1e-12, 1 - 1e-12))
+
+    def _occlusion(self, X):
+        # The rows, each of their one-feature occlusions and the reference
+        # customer go through predict_proba as one frame
+        X = X[FEATURE_COLUMNS]
+        frames = [X]
+        for col in self.features:
+            frames.append(X.assign(**{col: pd.Series(self.reference[col], index=X.index).astype(X[col].dtype)}))
+        frames.append(apply_schema(pd.DataFrame([self.reference]))[FEATURE_COLUMNS])
+        log_odds = self._log_odds(pd.concat(frames, ignore_index=True))
+        stacked = log_odds[:-1].reshape(len(self.features) + 1, len(X))
+        contributions = (stacked[0] - stacked[1:]).T
+        return contributions, np.full(len(X), log_odds[-1])
+
+    def explain_record(self, record):
+        # [(feature, contribution)] for one customer, largest effect first
+        contributions, _ = self.explain(apply_schema(records_to_frame([record])))
+        order = np.argsort(-np.abs(contributions[0]), kind='stable')
+        return [(self.features[j], float(contributions[0, j])) for j in order]
+
+    def top_drivers(self, X, k=3):
+        # "feature +0.84; feature -0.51; ..." per row, by absolute contribution
+        contributions, _ = self.explain(X)
+        top = np.argsort(-np.abs(contributions), axis=1, kind='stable')[:, :k]
+        values = np.take_along_axis(contributions, top, axis=1)
+        names = np.asarray(self.features, dtype=object)[top]
+        return ['; '.join(f"{n} {v:+.2f}" for n, v in zip(row_names, row_values))
+                for row_names, row_values in zip(names, values)]
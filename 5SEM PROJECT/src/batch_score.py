@@ -0,0 +1,101 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import time
+from dataset import default_data_path, iter_dataset, write_dataset
+from schema import FEATURE_COLUMNS, ID_COLUMN
+from scoring import churn_class_index, default_model_path, load_serving_model, risk_tiers
+from prediction_cache import PredictionCache
+from attributions import Explainer, background_sample
+
+DEFAULT_OUTPUT = 'data/churn_scores.parquet'
+
+def _predict_with_cache(model, features, churn_idx, cache):
+    # Looks every row up in the cache and runs predict_proba once on the misses
+    keys = [cache.key_for_row(row) for row in features.itertuples(index=False, name=None)]
+    proba = np.empty(len(keys))
+    missing = []
+    for i, key in enumerate(keys):
+        value = cache.get(None, key)
+        if value is None:
+            missing.append(i)
+        else:
+            proba[i] = value
+    if missing:
+        scored = model.predict_proba(features.iloc[missing])[:, churn_idx]
+        proba[missing] = scored
+        for i, value in zip(missing, scored):
+            cache.put(None, float(value), keys[i])
+    return proba
+
+def score_chunks(model, chunks, stats, cache=None, explainer=None, top_drivers=3):
+    # Scores each input chunk as it arrives; nothing but the current chunk
+    # and its scores is held in memory. With an explainer each row also gets
+    # its strongest feature contributions.
+    churn_idx = churn_class_index(model)
+    for chunk in chunks:
+        start = time.perf_counter()
+        if cache is None:
+            proba = model.predict_proba(chunk[FEATURE_COLUMNS])[:, churn_idx]
+        else:
+            proba = _predict_with_cache(model, chunk[FEATURE_COLUMNS], churn_idx, cache)
+        stats['score_seconds'] += time.perf_counter() - start
+        stats['rows'] += len(chunk)
+
+        scores = pd.DataFrame({
+            ID_COLUMN: chunk[ID_COLUMN].values,
+            'churn_probability': proba,
+            'risk_tier': risk_tiers(proba),
+        })
+        if explainer is not None:
+            start = time.perf_counter()
+            scores['top_drivers'] = explainer.top_drivers(chunk[FEATURE_COLUMNS], top_drivers)
+            stats['explain_seconds'] = stats.get('explain_seconds', 0.0) + time.perf_counter() - start
+        yield scores
+
+        elapsed = time.perf_counter() - stats['start']
+        print(f"  {stats['rows']:,} rows scored ({stats['rows'] / elapsed:,.0f} rows/sec)")
+
+def score_file(input_path, output_path, model_path=None, chunk_size=100_000, cache_size=0, top_drivers=0):
+    model_path = default_model_path() if model_path is None else model_path
+    model = load_serving_model(model_path)
+    cache = PredictionCache(cache_size) if cache_size > 0 else None
+    # Contributions are measured against the first rows of the input file
+    explainer = Explainer.from_model(model, background_sample(input_path)) if top_drivers > 0 else None
+    stats = {'rows': 0, 'score_seconds': 0.0, 'start': time.perf_counter()}
+
+    chunks = iter_dataset(input_path, columns=[ID_COLUMN] + FEATURE_COLUMNS, chunk_size=chunk_size)
+    write_dataset(score_chunks(model, chunks, stats, cache, explainer, top_drivers), output_path)
+    if cache is not None:
+        stats['cache'] = cache.stats()
+
+    stats['seconds'] = time.perf_counter() - stats.pop('start')
+    stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a whole customer file with the saved churn model")
+    parser.add_argument('--input', default=default_data_path())
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help="Output file; .parquet or .csv")
+    parser.add_argument('--model', default=default_model_path())
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help="Prediction cache entries; worth enabling when rows repeat (0 disables it)")
+    parser.add_argument('--top-drivers', type=int, default=0,
+                        help="Add a top_drivers column with this many features per customer (0 disables it)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print("Data file not found!")
+    else:
+        print(f"Scoring {args.input} in chunks of {args.chunk_size:,} rows...")
+        stats = score_file(args.input, args.output, args.model, args.chunk_size, args.cache_size, args.top_drivers)
+        print(f"{stats['rows']:,} rows scored in {stats['seconds']:.1f}s "
+              f"({stats['rows_per_sec']:,.0f} rows/sec, {stats['score_seconds']:.1f}s in predict_proba)")
+        if 'explain_seconds' in stats:
+            print(f"Top drivers computed in {stats['explain_seconds']:.1f}s")
+        if 'cache' in stats:
+            print(f"Prediction cache: {stats['cache']}")
+        print(f"Scores saved to {args.output}")
@@ -0,0 +1,182 @@
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from generate_data import generate_telecom_data
+from prediction_cache import CachedScorer, PredictionCache
+from schema import FEATURE_COLUMNS, apply_schema
+from artifact import CompiledModel
+from scoring import (FastScorer, PipelineScorer, churn_class_index, compile_scorer, default_model_path,
+                     load_model, load_serving_model, model_version)
+from bench_training import environment, git_commit
+
+DEFAULT_OUTPUT = 'benchmarks/inference.json'
+DEFAULT_BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+DEFAULT_THREADS = [1, 2, 4]
+FORMAT_VERSION = 1
+
+# Latency and throughput of every way the saved model is used to score:
+#
+#   single row   pipeline_dataframe  predict_proba on a schema-cast DataFrame
+#                pipeline_scorer     PipelineScorer (the generic fallback)
+#                fast_scorer         FastScorer, when the pipeline compiles
+#                cached_scorer       CachedScorer on a warm cache (hit path)
+#   batch        predict_proba on DataFrames of each batch size, with the
+#                batches spread over a pool of threads, for the Pipeline and
+#                (for artifact directories) the memory-mapped CompiledModel
+
+def _percentiles(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'p99_ms': round(float(np.percentile(ms, 99)), 4),
+        'mean_ms': round(float(ms.mean()), 4),
+    }
+
+def _time_calls(func, items, warmup=50):
+    for item in items[:warmup]:
+        func(item)
+    timings = []
+    for item in items:
+        start = time.perf_counter()
+        func(item)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def single_row_paths(model):
+    churn_idx = churn_class_index(model)
+    paths = {
+        'pipeline_dataframe': lambda r: model.predict_proba(
+            apply_schema(pd.DataFrame([r]), required=FEATURE_COLUMNS))[0, churn_idx],
+        'pipeline_scorer': PipelineScorer(model).score,
+    }
+    try:
+        paths['fast_scorer'] = FastScorer(model).score
+    except (ValueError, AttributeError, KeyError):
+        pass
+    cached = CachedScorer(compile_scorer(model), PredictionCache())
+    paths['cached_scorer'] = cached.score
+    return paths
+
+def bench_single_row(model, records, n_calls=1_000):
+    results = {}
+    items = records[:n_calls]
+    for name, func in single_row_paths(model).items():
+        if name == 'cached_scorer':
+            for record in items:
+                func(record)  # warm the cache so every timed call is a hit
+        results[name] = _percentiles(_time_calls(func, items))
+        print(f"  {name}: p50 {results[name]['p50_ms']:.3f} ms, p99 {results[name]['p99_ms']:.3f} ms")
+    return results
+
+def bench_batches(name, model, X, batch_sizes, thread_counts, min_seconds=1.0):
+    # Rows/sec for each (batch size, threads) pair. Each thread scores its own
+    # stream of batches for at least min_seconds (and at least one batch).
+    churn_idx = churn_class_index(model)
+    results = []
+    for batch_size in batch_sizes:
+        batch_size = min(batch_size, len(X))
+        starts = range(0, len(X) - batch_size + 1, batch_size)[:1_000]
+        batches = [X.iloc[i:i + batch_size] for i in starts]
+        for threads in thread_counts:
+            def worker(offset):
+                rows = 0
+                i = offset
+                start = time.perf_counter()
+                while rows == 0 or time.perf_counter() - start < min_seconds:
+                    model.predict_proba(batches[i % len(batches)])[:, churn_idx]
+                    rows += batch_size
+                    i += threads
+                return rows
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(threads) as pool:
+                rows = sum(pool.map(worker, range(threads)))
+            seconds = time.perf_counter() - start
+            results.append({
+                'path': name,
+                'batch_size': batch_size,
+                'threads': threads,
+                'rows': rows,
+                'seconds': round(seconds, 4),
+                'rows_per_sec': round(rows / seconds, 1),
+            })
+            print(f"  {name} batch {batch_size:>7,} x {threads} threads: {rows / seconds:,.0f} rows/sec")
+    return results
+
+def _artifact_bytes(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+def bench_load(model_path, repeats=5):
+    # Cold-ish load time of each way to open the model
+    loaders = {'pipeline': lambda: load_model(model_path)}
+    if isinstance(load_serving_model(model_path), CompiledModel):
+        loaders['compiled'] = lambda: load_serving_model(model_path)
+    result = {'artifact_bytes': _artifact_bytes(model_path)}
+    for name, loader in loaders.items():
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            loader()
+            timings.append(time.perf_counter() - start)
+        result[f'{name}_load_seconds_min'] = round(min(timings), 4)
+        result[f'{name}_load_seconds_median'] = round(float(np.median(timings)), 4)
+    return result
+
+def run_benchmarks(model_path=None, n_rows=20_000, batch_sizes=DEFAULT_BATCH_SIZES,
+                   thread_counts=DEFAULT_THREADS, n_calls=1_000, seed=7):
+    model_path = default_model_path() if model_path is None else model_path
+    print("Model load...")
+    load = bench_load(model_path)
+    model = load_model(model_path)
+    batch_models = {'pipeline': model}
+    serving_model = load_serving_model(model_path)
+    if isinstance(serving_model, CompiledModel):
+        batch_models['compiled'] = serving_model
+    X = generate_telecom_data(n_rows, seed)[FEATURE_COLUMNS]
+    records = X.to_dict('records')
+
+    print("Single-row latency...")
+    single = bench_single_row(model, records, n_calls)
+    print("Batch throughput...")
+    batches = []
+    for name, batch_model in batch_models.items():
+        batches.extend(bench_batches(name, batch_model, X, batch_sizes, thread_counts))
+
+    return {
+        'benchmark': 'inference',
+        'format_version': FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': git_commit(),
+        'environment': environment(),
+        'model': {
+            'path': model_path,
+            'version': model_version(model_path),
+            'classifier': type(model.named_steps['classifier']).__name__,
+            **load,
+        },
+        'single_row': single,
+        'batch': batches,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scoring latency and throughput of the saved model")
+    parser.add_argument('--model', default=default_model_path())
+    parser.add_argument('--rows', type=int, default=20_000, help="Generated customers to score")
+    parser.add_argument('--calls', type=int, default=1_000, help="Timed single-row calls per path")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=DEFAULT_BATCH_SIZES)
+    parser.add_argument('--threads', type=int, nargs='+', default=DEFAULT_THREADS)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.model, args.rows, args.batch_sizes, args.threads, args.calls)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results saved to {args.output}")
@@ -0,0 +1,154 @@
+import numpy as np
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import sklearn
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from artifact import save_artifact
+from generate_data import generate_telecom_data
+from schema import CATEGORIES, FEATURE_COLUMNS, TARGET
+from train_model import ENGINES
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_OUTPUT = 'benchmarks/training.json'
+
+# Times every stage of train_models on generated datasets of growing size.
+# Peak memory is the largest traced allocation during the stage (tracemalloc
+# sees numpy buffers too), measured separately for each stage. Tracing slows
+# allocation-heavy stages down, so use --no-memory for clean timings.
+
+def _measure(func, *args):
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    stats = {'seconds': round(seconds, 4)}
+    if tracing:
+        _, peak = tracemalloc.get_traced_memory()
+        stats['peak_mb'] = round((peak - base) / 1e6, 2)
+    return result, stats
+
+def _dump(model):
+    # What training writes: the artifact directory (metadata, classifier
+    # arrays, preprocessor), not a single pickle
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model')
+        save_artifact(model, path, target_classes=CATEGORIES[TARGET])
+        return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+def bench_size(n_rows, engine='default', models=None, skip=(), seed=42):
+    df, generate = _measure(generate_telecom_data, n_rows, seed)
+    X = df[FEATURE_COLUMNS]
+    y = (df[TARGET] == 'Yes').to_numpy(dtype=np.int64)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    del df
+
+    preprocessor, candidates = ENGINES[engine]()
+    X_train_enc, preprocess_fit = _measure(preprocessor.fit_transform, X_train)
+    X_test_enc, preprocess_transform = _measure(preprocessor.transform, X_test)
+    result = {
+        'rows': n_rows,
+        'engine': engine,
+        'generate': generate,
+        'preprocess_fit': preprocess_fit,
+        'preprocess_transform': preprocess_transform,
+        'encoded_features': int(X_train_enc.shape[1]),
+        'models': {},
+    }
+
+    for name, model in candidates.items():
+        if models and name not in models:
+            continue
+        if name in skip:
+            result['models'][name] = {'skipped': True}
+            continue
+        model = clone(model)
+        _, fit = _measure(model.fit, X_train_enc, y_train)
+        y_pred, predict = _measure(model.predict, X_test_enc)
+        _, predict_proba = _measure(model.predict_proba, X_test_enc)
+        pipeline = Pipeline(steps=[('preprocessor', preprocessor), ('classifier', model)])
+        size, dump = _measure(_dump, pipeline)
+        result['models'][name] = {
+            'fit': fit,
+            'predict': predict,
+            'predict_proba': predict_proba,
+            'dump': dump,
+            'artifact_bytes': size,
+            'accuracy': round(float((y_pred == y_test).mean()), 4),
+        }
+        print(f"  {name}: fit {fit['seconds']:.2f}s, "
+              f"predict {predict['seconds']:.3f}s, dump {dump['seconds']:.3f}s")
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def run_benchmarks(sizes=DEFAULT_SIZES, engine='default', models=None, max_fit_seconds=None, trace_memory=True):
+    # A model is skipped at the next size once its fit time, scaled up
+    # linearly with the row count, would exceed max_fit_seconds
+    if trace_memory:
+        tracemalloc.start()
+    sizes = sorted(sizes)
+    results = []
+    skip = set()
+    try:
+        for n_rows, next_rows in zip(sizes, sizes[1:] + [None]):
+            print(f"{n_rows:,} rows...")
+            result = bench_size(n_rows, engine, models, skip)
+            results.append(result)
+            if max_fit_seconds is None or next_rows is None:
+                continue
+            for name, stats in result['models'].items():
+                if 'fit' in stats and stats['fit']['seconds'] * next_rows / n_rows > max_fit_seconds:
+                    skip.add(name)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return {
+        'benchmark': 'training',
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': git_commit(),
+        'environment': environment(),
+        'trace_memory': trace_memory,
+        'results': results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark model training across dataset sizes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--engine', choices=list(ENGINES), default='default')
+    parser.add_argument('--models', nargs='+', default=None, help="Only these candidate names")
+    parser.add_argument('--max-fit-seconds', type=float, default=600,
+                        help="Skip a model at sizes where its projected fit time exceeds this")
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc for undistorted timings")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.engine, args.models, args.max_fit_seconds, not args.no_memory)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
@@ -0,0 +1,107 @@
+import pandas as pd
+import numpy as np
+import time
+from dataset import iter_dataset
+from eda_aggregates import HISTOGRAM_BIN_WIDTHS, StreamingHistogram
+from schema import CATEGORIES, NUMERIC_RANGES, TARGET
+
+# Aggregate cube behind the dashboard's statistics panels, built in one
+# streamed pass per dataset version:
+#
+#   axes       tenure month x Contract x InternetService x PaymentMethod
+#   measures   customers, churned customers, MonthlyCharges and
+#              TotalCharges sums
+#
+# Every measure is also kept as a prefix sum over tenure, so a query for any
+# tenure range and any combination of the other axes reads two tenure slices
+# of 3 x 3 x 4 cells, whatever the number of customers.
+
+CUBE_AXES = ['Contract', 'InternetService', 'PaymentMethod']
+MEASURES = ['customers', 'churned', 'monthly_charges', 'total_charges']
+CUBE_COLUMNS = ['tenure'] + CUBE_AXES + [TARGET, 'MonthlyCharges', 'TotalCharges']
+CHURN_LABEL = 'Yes'
+
+class ChurnCube:
+    def __init__(self):
+        self.max_tenure = NUMERIC_RANGES['tenure'][1]
+        self.shape = (self.max_tenure + 1,) + tuple(len(CATEGORIES[axis]) for axis in CUBE_AXES)
+        self.cells = {measure: np.zeros(self.shape) for measure in MEASURES}
+        self.monthly_charges = StreamingHistogram(*NUMERIC_RANGES['MonthlyCharges'],
+                                                  HISTOGRAM_BIN_WIDTHS['MonthlyCharges'])
+        self._prefix = None
+
+    def update(self, chunk):
+        codes = [chunk['tenure'].to_numpy(dtype=np.int64)]
+        codes += [chunk[axis].cat.codes.to_numpy(dtype=np.int64) for axis in CUBE_AXES]
+        flat = np.ravel_multi_index(codes, self.shape)
+        size = self.cells['customers'].size
+        weights = {
+            'customers': None,
+            'churned': (chunk[TARGET] == CHURN_LABEL).to_numpy(dtype=np.float64),
+            'monthly_charges': chunk['MonthlyCharges'].to_numpy(dtype=np.float64),
+            'total_charges': chunk['TotalCharges'].to_numpy(dtype=np.float64),
+        }
+        for measure, weight in weights.items():
+            self.cells[measure] += np.bincount(flat, weights=weight, minlength=size).reshape(self.shape)
+        self.monthly_charges.update(chunk['MonthlyCharges'].to_numpy())
+        self._prefix = None
+
+    @property
+    def prefix(self):
+        # prefix[m][t] holds the sums over tenure months below t
+        if self._prefix is None:
+            self._prefix = {
+                measure: np.concatenate([np.zeros((1,) + self.shape[1:]), np.cumsum(cells, axis=0)])
+                for measure, cells in self.cells.items()
+            }
+        return self._prefix
+
+    def _selection(self, filters):
+        index = []
+        for axis in CUBE_AXES:
+            value = filters.pop(axis, None)
+            index.append(slice(None) if value is None else CATEGORIES[axis].index(value))
+        if filters:
+            raise ValueError(f"unknown cube axes {sorted(filters)}; expected {CUBE_AXES}")
+        return tuple(index)
+
+    def totals(self, tenure=None, **filters):
+        # Measure sums over customers with tenure in the inclusive range
+        # (low, high) and the given Contract / InternetService / PaymentMethod
+        low, high = (0, self.max_tenure) if tenure is None else tenure
+        low = min(max(int(low), 0), self.max_tenure + 1)
+        high = min(max(int(high), low - 1), self.max_tenure)
+        index = self._selection(dict(filters))
+        return {
+            measure: float((prefix[high + 1] - prefix[low])[index].sum())
+            for measure, prefix in self.prefix.items()
+        }
+
+    def counts_by(self, axis):
+        # Customers per category, largest first, like value_counts()
+        position = 1 + CUBE_AXES.index(axis)
+        other = tuple(i for i in range(len(self.shape)) if i != position)
+        counts = self.cells['customers'].sum(axis=other).astype(np.int64)
+        return pd.Series(counts, index=pd.Index(CATEGORIES[axis], name=axis), name='count').sort_values(
+            ascending=False, kind='stable')
+
+    def churn_counts(self):
+        churned = int(self.cells['churned'].sum())
+        total = int(self.cells['customers'].sum())
+        return pd.Series({'No': total - churned, 'Yes': churned}, name='count').sort_values(
+            ascending=False, kind='stable')
+
+    def mean_tenure(self):
+        per_month = self.cells['customers'].reshape(self.shape[0], -1).sum(axis=1)
+        total = per_month.sum()
+        return float(np.arange(self.shape[0]) @ per_month / total) if total else float('nan')
+
+def build_cube(path, chunk_size=100_000):
+    cube = ChurnCube()
+    start = time.perf_counter()
+    rows = 0
+    for chunk in iter_dataset(path, columns=CUBE_COLUMNS, chunk_size=chunk_size):
+        cube.update(chunk)
+        rows += len(chunk)
+    print(f"Churn cube: {rows:,} rows aggregated in {time.perf_counter() - start:.1f}s")
+    return cube
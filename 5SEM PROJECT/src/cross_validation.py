@@ -0,0 +1,78 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import time
+from joblib import Memory, Parallel, delayed, hash as joblib_hash
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+CACHE_DIR = 'models/cache'
+
+def data_hash(X, y):
+    # Content hash of the rows and labels; cheap next to encoding them
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    return digest.hexdigest()[:16]
+
+def preprocessing_hash(preprocessor):
+    # Hash of the unfitted preprocessing config (steps and their parameters)
+    return joblib_hash(clone(preprocessor))
+
+def _encode_fold(data_key, config_key, n_splits, random_state, fold, preprocessor, X, train_idx, test_idx):
+    # Only the leading key arguments identify a cache entry; the frame,
+    # indices and preprocessor follow from them and are not hashed
+    preprocessor = clone(preprocessor)
+    X_train = preprocessor.fit_transform(X.iloc[train_idx])
+    X_test = preprocessor.transform(X.iloc[test_idx])
+    return X_train, X_test
+
+def _score_fold(name, model, fold, X_train, y_train, X_test, y_test):
+    model = clone(model)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    proba = model.predict_proba(X_test)[:, 1]
+    y_pred = model.predict(X_test)
+    return {
+        'model': name,
+        'fold': fold,
+        'accuracy': accuracy_score(y_test, y_pred),
+        'f1': f1_score(y_test, y_pred),
+        'roc_auc': roc_auc_score(y_test, proba),
+        'fit_seconds': fit_seconds,
+    }
+
+def cross_validate_models(models, preprocessor, X, y, n_splits=5, n_jobs=-1,
+                          random_state=42, cache_dir=CACHE_DIR):
+    # Stratified k-fold evaluation of every model. Each fold's encoded
+    # matrices are memoized on disk under (data hash, preprocessing hash,
+    # fold), so repeated runs and new candidates skip re-encoding. Folds are
+    # encoded in parallel, then every (model, fold) pair is fitted in
+    # parallel. Returns a DataFrame with one row per model and fold.
+    encode = Memory(cache_dir, verbose=0).cache(
+        _encode_fold, ignore=['preprocessor', 'X', 'train_idx', 'test_idx']
+    )
+    data_key = data_hash(X, y)
+    config_key = preprocessing_hash(preprocessor)
+    splits = list(StratifiedKFold(n_splits, shuffle=True, random_state=random_state).split(X, y))
+
+    start = time.perf_counter()
+    encoded = Parallel(n_jobs=n_jobs)(
+        delayed(encode)(data_key, config_key, n_splits, random_state, fold, preprocessor, X, train_idx, test_idx)
+        for fold, (train_idx, test_idx) in enumerate(splits)
+    )
+    print(f"  {n_splits} folds encoded in {time.perf_counter() - start:.1f}s (cache key {data_key}/{config_key[:8]})")
+
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_score_fold)(name, model, fold, X_train, y[train_idx], X_test, y[test_idx])
+        for name, model in models.items()
+        for fold, ((train_idx, test_idx), (X_train, X_test)) in enumerate(zip(splits, encoded))
+    )
+    return pd.DataFrame(results)
+
+def summarize(results):
+    # Mean and standard deviation of each metric per model
+    metrics = ['accuracy', 'f1', 'roc_auc', 'fit_seconds']
+    return results.groupby('model', sort=False)[metrics].agg(['mean', 'std'])
@@ -0,0 +1,86 @@
+import pandas as pd
+import numpy as np
+
+DEFAULT_LIMIT = 20
+
+class CustomerIndex:
+    # Prefix search over customer names and IDs plus exact ID lookup.
+    # Everything returned is a row position into the frame the index was
+    # built from, so fetching the record is a single df.iloc[...] call.
+
+    def __init__(self, names, customer_ids):
+        names = pd.Categorical(names)
+        ids = np.asarray(customer_ids, dtype=str)
+
+        # Names: search the (small) sorted category list, then expand the
+        # matching categories to rows through a codes -> rows grouping.
+        labels = np.asarray(names.categories, dtype=str)
+        lowered = np.char.lower(labels)
+        order = np.argsort(lowered)
+        self._name_labels = labels
+        self._name_keys = lowered[order]
+        self._name_codes = order
+
+        codes = names.codes
+        self._codes = codes
+        self._rows_by_code = np.argsort(codes, kind='stable')
+        self._code_bounds = np.searchsorted(codes[self._rows_by_code], np.arange(len(labels) + 1))
+
+        # IDs: one sorted array for prefix ranges, one hash index for exact hits
+        upper = np.char.upper(ids)
+        order = np.argsort(upper, kind='stable')
+        self._id_keys = upper[order]
+        self._id_rows = order
+        self._ids = ids
+        self._id_lookup = pd.Index(upper)
+        self._id_lookup.is_unique  # builds the hash table now, not on the first lookup
+
+    def __len__(self):
+        return len(self._ids)
+
+    @classmethod
+    def from_frame(cls, df, name_column='CustomerName', id_column='customerID'):
+        return cls(df[name_column], df[id_column])
+
+    def _prefix_range(self, keys, prefix):
+        lo = np.searchsorted(keys, prefix, side='left')
+        hi = np.searchsorted(keys, prefix + '\uffff', side='left')
+        return lo, hi
+
+    def label(self, row):
+        return f"{self._name_labels[self._codes[row]]} ({self._ids[row]})"
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        # Returns up to `limit` (label, row) pairs: name matches first, then
+        # customerID matches. Cost depends on `limit`, not on the number of
+        # customers.
+        query = query.strip()
+        if not query:
+            return []
+
+        results = []
+        lo, hi = self._prefix_range(self._name_keys, query.lower())
+        for code in self._name_codes[lo:hi]:
+            start, end = self._code_bounds[code], self._code_bounds[code + 1]
+            for row in self._rows_by_code[start:min(end, start + limit - len(results))]:
+                results.append((self.label(row), int(row)))
+            if len(results) >= limit:
+                return results
+
+        lo, hi = self._prefix_range(self._id_keys, query.upper())
+        for row in self._id_rows[lo:min(hi, lo + limit - len(results))]:
+            results.append((self.label(row), int(row)))
+        return results
+
+    def row_for_id(self, customer_id):
+        # Exact customerID -> row position (the first one if the ID repeats),
+        # or None when it is unknown
+        try:
+            row = self._id_lookup.get_loc(customer_id.strip().upper())
+        except KeyError:
+            return None
+        if isinstance(row, slice):
+            return row.start
+        if isinstance(row, np.ndarray):
+            return int(np.flatnonzero(row)[0])
+        return int(row)
@@ -0,0 +1,81 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dataset import dataset_fingerprint, default_data_path, load_dataset
+from schema import NAME_COLUMN
+
+FIRST_NAMES_MALE = [
+    'Rajesh', 'Amit', 'Arjun', 'Vikram', 'Rohit', 'Akshay',
+    'Sanjay', 'Pradeep', 'Nikhil', 'Arun', 'Varun', 'Karthik',
+    'Mahesh', 'Suresh', 'Bhaskar', 'Deepak', 'Ashok', 'Ravi',
+    'Kumar', 'Jitesh', 'Manish', 'Naveen', 'Sachin', 'Rahul'
+]
+FIRST_NAMES_FEMALE = [
+    'Priya', 'Anjali', 'Neha', 'Divya', 'Shreya', 'Pooja',
+    'Isha', 'Megha', 'Sneha', 'Ananya', 'Riya', 'Kavya',
+    'Simran', 'Nikita', 'Geeta', 'Aarti', 'Rani', 'Sunita',
+    'Meera', 'Lata', 'Kalpana', 'Swati', 'Vidya', 'Seema'
+]
+LAST_NAMES = [
+    'Sharma', 'Singh', 'Kumar', 'Patel', 'Gupta', 'Verma',
+    'Reddy', 'Rao', 'Pillai', 'Nair', 'Desai', 'Kapoor',
+    'Joshi', 'Iyer', 'Menon', 'Bhat', 'Das', 'Roy', 'Khan',
+    'Ahmed', 'Chopra', 'Malhotra', 'Bansal', 'Saxena', 'Tiwari',
+    'Mishra', 'Pandey'
+]
+
+# Every possible "First Last" combination; a name is stored as its code in
+# this list, so a million names cost one small integer each.
+FIRST_NAMES = FIRST_NAMES_MALE + FIRST_NAMES_FEMALE
+NAME_CATEGORIES = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+
+def generate_customer_names(gender, seed=42):
+    # Vectorized over the whole gender column. seed may also be an existing
+    # numpy Generator, which lets the data generator share its chunk stream.
+    rng = np.random.default_rng(seed)
+    is_female = np.asarray(gender == 'Female')
+    n = len(is_female)
+
+    first = rng.integers(0, np.where(is_female, len(FIRST_NAMES_FEMALE), len(FIRST_NAMES_MALE)))
+    first = np.where(is_female, len(FIRST_NAMES_MALE) + first, first)
+    last = rng.integers(0, len(LAST_NAMES), n)
+
+    return pd.Categorical.from_codes(first * len(LAST_NAMES) + last, NAME_CATEGORIES)
+
+def names_path(data_path):
+    # Sidecar file for datasets written before names were stored in them
+    return os.path.splitext(data_path.rstrip('/\\'))[0] + '.names.parquet'
+
+def load_customer_names(data_path, df):
+    # Returns the names for df (read from data_path in file order). Datasets
+    # that carry a CustomerName column are used as is; otherwise the names
+    # are generated once and persisted next to the dataset.
+    if NAME_COLUMN in df.columns:
+        return df[NAME_COLUMN]
+
+    sidecar = names_path(data_path)
+    if os.path.exists(sidecar):
+        table = pq.read_table(sidecar)
+        metadata = table.schema.metadata or {}
+        if (metadata.get(b'source') == dataset_fingerprint(data_path).encode()
+                and table.num_rows == len(df)):
+            names = table.column(NAME_COLUMN).to_pandas()
+            return names.cat.set_categories(NAME_CATEGORIES).values
+
+    names = generate_customer_names(df['gender'])
+    table = pa.Table.from_pandas(pd.DataFrame({NAME_COLUMN: names}), preserve_index=False)
+    table = table.replace_schema_metadata({'source': dataset_fingerprint(data_path)})
+    pq.write_table(table, sidecar)
+    return names
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute customer names for a dataset without a CustomerName column")
+    parser.add_argument('--data', default=default_data_path())
+    args = parser.parse_args()
+
+    df = load_dataset(args.data, columns=['gender'])
+    load_customer_names(args.data, df)
+    print(f"Names for {len(df):,} customers saved to {names_path(args.data)}")
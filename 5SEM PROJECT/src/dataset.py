@@ -0,0 +1,149 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import argparse
+import glob
+import hashlib
+import os
+from schema import COLUMNS, CSV_DTYPES, apply_schema
+
+CSV_PATH = 'data/telecom_churn.csv'
+PARQUET_PATH = 'data/telecom_churn.parquet'
+
+FILTER_OPS = {
+    '==': lambda s, v: s == v,
+    '=': lambda s, v: s == v,
+    '!=': lambda s, v: s != v,
+    '<': lambda s, v: s < v,
+    '<=': lambda s, v: s <= v,
+    '>': lambda s, v: s > v,
+    '>=': lambda s, v: s >= v,
+    'in': lambda s, v: s.isin(v),
+    'not in': lambda s, v: ~s.isin(v),
+}
+
+def default_data_path():
+    # Prefer the columnar copy once it has been built, fall back to the CSV
+    if os.path.exists(PARQUET_PATH):
+        return PARQUET_PATH
+    return CSV_PATH
+
+def is_parquet(path):
+    if os.path.isdir(path):
+        return bool(glob.glob(os.path.join(path, '*.parquet')))
+    return path.endswith('.parquet')
+
+def _csv_files(path):
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, '*.csv')))
+    return [path]
+
+def _parquet_files(path):
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, '*.parquet')))
+    return [path]
+
+def list_columns(path):
+    # Column names stored in a dataset, without reading any rows
+    if is_parquet(path):
+        return pq.read_schema(_parquet_files(path)[0]).names
+    return list(pd.read_csv(_csv_files(path)[0], nrows=0).columns)
+
+def _apply_filters(df, filters):
+    # filters is a list of (column, op, value) tuples that must all hold,
+    # the same form pandas/pyarrow accept for Parquet predicate pushdown
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        mask &= FILTER_OPS[op](df[column], value)
+    return df[mask.values]
+
+def load_dataset(path, columns=None, filters=None):
+    # Reads a single file or a directory of partition files. For Parquet only
+    # the requested columns are decoded and row groups whose statistics rule
+    # out the filters are skipped; CSV is filtered after parsing. Either way
+    # the result is validated and cast to the compact schema dtypes.
+    if is_parquet(path):
+        df = pd.read_parquet(path, columns=columns, filters=filters)
+    else:
+        frames = [pd.read_csv(f, usecols=columns, dtype=CSV_DTYPES) for f in _csv_files(path)]
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        if filters:
+            df = _apply_filters(df, filters).reset_index(drop=True)
+    return apply_schema(df, required=columns or COLUMNS)
+
+def iter_dataset(path, columns=None, chunk_size=100_000):
+    # Streams a dataset as schema-checked DataFrames of at most chunk_size
+    # rows, so callers can process files larger than memory.
+    if is_parquet(path):
+        for f in _parquet_files(path):
+            for batch in pq.ParquetFile(f).iter_batches(batch_size=chunk_size, columns=columns):
+                yield apply_schema(batch.to_pandas(), required=columns or COLUMNS)
+    else:
+        for f in _csv_files(path):
+            for chunk in pd.read_csv(f, usecols=columns, dtype=CSV_DTYPES, chunksize=chunk_size):
+                yield apply_schema(chunk, required=columns or COLUMNS)
+
+def dataset_fingerprint(path):
+    # Cheap stand-in for dataset_hash: changes whenever the file, or any
+    # partition file of a partitioned dataset, is added, removed or rewritten
+    if not os.path.isdir(path):
+        stat = os.stat(path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+    files = _parquet_files(path) if is_parquet(path) else _csv_files(path)
+    digest = hashlib.sha256()
+    for file in files:
+        stat = os.stat(file)
+        digest.update(f"{os.path.basename(file)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return f"{len(files)}:{digest.hexdigest()[:16]}"
+
+def dataset_hash(path, columns=None, chunk_size=100_000):
+    # Content hash of the (schema-cast) rows, streamed so it works on data
+    # larger than memory; the same rows give the same hash in CSV or Parquet
+    digest = hashlib.sha256()
+    for chunk in iter_dataset(path, columns=columns, chunk_size=chunk_size):
+        digest.update(pd.util.hash_pandas_object(chunk, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+def _to_arrow(chunk, schema=None):
+    # Categorical columns become dictionary-encoded Arrow columns
+    return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+def _write_csv(chunks, path):
+    rows = 0
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        rows += len(chunk)
+    return rows
+
+def write_dataset(chunks, path):
+    # Streams an iterable of DataFrames into one file, so the writer never
+    # holds more than a single chunk. A .parquet path gets one row group per
+    # chunk; anything else is written as CSV.
+    if not is_parquet(path):
+        return _write_csv(chunks, path)
+
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            table = _to_arrow(chunk, writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='snappy')
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def convert_csv(csv_path, parquet_path, chunk_size=250_000):
+    return write_dataset(iter_dataset(csv_path, chunk_size=chunk_size), parquet_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the churn CSV to the columnar Parquet format")
+    parser.add_argument('--input', default=CSV_PATH)
+    parser.add_argument('--output', default=PARQUET_PATH)
+    args = parser.parse_args()
+
+    rows = convert_csv(args.input, args.output)
+    print(f"{rows:,} rows written to {args.output}")
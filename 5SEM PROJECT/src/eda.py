@@ -1,58 +1,151 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+import argparse
+import inspect
+import json
 import os
+import time
+from joblib import Parallel, delayed, hash as joblib_hash
+from dataset import default_data_path
+from eda_aggregates import CROSSTAB_COLUMNS, HISTOGRAM_COLUMNS, aggregate_dataset
+from schema import TARGET
 
-# Set style
-sns.set(style='whitegrid')
+# The plots are drawn from aggregates built in one streamed pass (see
+# eda_aggregates.py), so no step holds or rescans the raw rows.
+#
+# Each figure is a render function plus the small inputs it draws from. The
+# hash of those inputs, the plot settings and the function's source is kept
+# in plots/.eda_cache.json; a figure is only redrawn when its hash changes or
+# its file is gone, and the figures that need redrawing are spread over a
+# process pool.
 
-def perform_eda(file_path):
-    print("Loading data for EDA...")
-    df = pd.read_csv(file_path)
-    
-    # 1. Churn Distribution
-    plt.figure(figsize=(6, 4))
-    sns.countplot(x='Churn', data=df)
+PLOTS_DIR = 'plots'
+CACHE_FILE = '.eda_cache.json'
+
+def render_churn_distribution(path, counts, figsize=(6, 4)):
+    plt.figure(figsize=figsize)
+    sns.barplot(x=TARGET, y='count', data=counts)
     plt.title('Distribution of Churn')
-    plt.savefig('plots/churn_distribution.png')
+    plt.savefig(path)
     plt.close()
-    
-    # 2. Numerical Features Distribution
-    num_cols = ['tenure', 'MonthlyCharges', 'TotalCharges']
-    plt.figure(figsize=(15, 5))
-    for i, col in enumerate(num_cols):
-        plt.subplot(1, 3, i+1)
-        sns.histplot(df[col], kde=True, bins=30)
+
+def render_numerical_distributions(path, histograms, figsize=(15, 5)):
+    # histograms: column -> (counts, edges, kde grid, kde counts)
+    plt.figure(figsize=figsize)
+    for i, (col, (counts, edges, grid, kde)) in enumerate(histograms.items()):
+        plt.subplot(1, len(histograms), i+1)
+        sns.histplot(x=edges[:-1], weights=counts, bins=len(counts), binrange=(edges[0], edges[-1]))
+        plt.plot(grid, kde)
+        plt.xlabel(col)
         plt.title(f'Distribution of {col}')
     plt.tight_layout()
-    plt.savefig('plots/numerical_distributions.png')
+    plt.savefig(path)
     plt.close()
-    
-    # 3. Correlation Matrix (Numerical)
-    plt.figure(figsize=(8, 6))
-    # Select only numeric columns for correlation matrix
-    numeric_df = df.select_dtypes(include=['number'])
-    sns.heatmap(numeric_df.corr(), annot=True, cmap='coolwarm', fmt=".2f")
+
+def render_correlation_matrix(path, corr, figsize=(8, 6)):
+    plt.figure(figsize=figsize)
+    sns.heatmap(corr, annot=True, cmap='coolwarm', fmt=".2f")
     plt.title('Correlation Matrix')
-    plt.savefig('plots/correlation_matrix.png')
+    plt.savefig(path)
     plt.close()
-    
-    # 4. Categorical Features vs Churn
-    cat_cols = ['Contract', 'InternetService', 'PaymentMethod']
-    plt.figure(figsize=(15, 5))
-    for i, col in enumerate(cat_cols):
-        plt.subplot(1, 3, i+1)
-        sns.countplot(x=col, hue='Churn', data=df)
+
+def render_categorical_vs_churn(path, crosstabs, figsize=(15, 5)):
+    # crosstabs: column -> long frame of (column, Churn, count)
+    plt.figure(figsize=figsize)
+    for i, (col, counts) in enumerate(crosstabs.items()):
+        plt.subplot(1, len(crosstabs), i+1)
+        sns.barplot(x=col, y='count', hue=TARGET, data=counts)
         plt.title(f'{col} vs Churn')
         plt.xticks(rotation=45)
     plt.tight_layout()
-    plt.savefig('plots/categorical_vs_churn.png')
+    plt.savefig(path)
     plt.close()
 
-    print("EDA plots saved in 'plots/' directory.")
+def figure_specs(aggregates, bins=30):
+    # file name -> (render function, keyword arguments)
+    std = aggregates.moments.std()
+    histograms = {}
+    for col in HISTOGRAM_COLUMNS:
+        histogram = aggregates.histograms[col]
+        counts, edges = histogram.binned(bins)
+        grid, density = histogram.kde(std[col])
+        # KDE scaled to counts per plotted bin, as histplot(kde=True) draws it
+        histograms[col] = (counts, edges, grid, density * histogram.n * (edges[1] - edges[0]))
+    crosstabs = {
+        col: aggregates.crosstabs[col].frame().stack().rename('count').reset_index()
+        for col in CROSSTAB_COLUMNS
+    }
+    return {
+        'churn_distribution.png': (render_churn_distribution,
+                                   {'counts': aggregates.target_distribution().reset_index()}),
+        'numerical_distributions.png': (render_numerical_distributions, {'histograms': histograms}),
+        'correlation_matrix.png': (render_correlation_matrix, {'corr': aggregates.moments.corr()}),
+        'categorical_vs_churn.png': (render_categorical_vs_churn, {'crosstabs': crosstabs}),
+    }
+
+def figure_hash(render, kwargs):
+    return joblib_hash((inspect.getsource(render), kwargs))
+
+def _render(render, path, kwargs):
+    # Runs in a pool worker, which does not share the parent's style
+    sns.set(style='whitegrid')
+    render(path, **kwargs)
+    return path
+
+def _load_cache(plots_dir):
+    try:
+        with open(os.path.join(plots_dir, CACHE_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def _save_cache(plots_dir, hashes):
+    path = os.path.join(plots_dir, CACHE_FILE)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(hashes, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+def render_figures(specs, plots_dir=PLOTS_DIR, n_jobs=-1, force=False):
+    # Redraws the figures whose inputs changed; returns their file names
+    os.makedirs(plots_dir, exist_ok=True)
+    cached = {} if force else _load_cache(plots_dir)
+    hashes = {name: figure_hash(render, kwargs) for name, (render, kwargs) in specs.items()}
+    stale = [
+        name for name in specs
+        if cached.get(name) != hashes[name] or not os.path.exists(os.path.join(plots_dir, name))
+    ]
+    if stale:
+        workers = min(n_jobs if n_jobs > 0 else os.cpu_count(), len(stale))
+        Parallel(n_jobs=workers)(
+            delayed(_render)(specs[name][0], os.path.join(plots_dir, name), specs[name][1])
+            for name in stale
+        )
+    cached.update(hashes)
+    _save_cache(plots_dir, cached)
+    return stale
+
+def perform_eda(file_path, chunk_size=100_000, plots_dir=PLOTS_DIR, n_jobs=-1, force=False):
+    print("Aggregating data for EDA...")
+    aggregates = aggregate_dataset(file_path, chunk_size)
+
+    start = time.perf_counter()
+    specs = figure_specs(aggregates)
+    drawn = render_figures(specs, plots_dir, n_jobs, force)
+    print(f"  {len(drawn)} of {len(specs)} figures redrawn in {time.perf_counter() - start:.1f}s"
+          + (f": {', '.join(drawn)}" if drawn else ""))
+
+    print(f"EDA plots saved in '{plots_dir}/' directory.")
 
 if __name__ == "__main__":
-    if os.path.exists('data/telecom_churn.csv'):
-        perform_eda('data/telecom_churn.csv')
+    parser = argparse.ArgumentParser(description="Render the EDA plots from one streamed pass over the dataset")
+    parser.add_argument('--data', default=default_data_path())
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--plots-dir', default=PLOTS_DIR)
+    parser.add_argument('--jobs', type=int, default=-1, help="Processes for rendering (-1 = all cores)")
+    parser.add_argument('--force', action='store_true', help="Redraw every figure even if unchanged")
+    args = parser.parse_args()
+
+    if os.path.exists(args.data):
+        perform_eda(args.data, args.chunk_size, args.plots_dir, args.jobs, args.force)
     else:
         print("Data file not found!")
@@ -0,0 +1,159 @@
+import pandas as pd
+import numpy as np
+import time
+from dataset import iter_dataset
+from schema import CATEGORIES, NUMERIC_DTYPES, NUMERIC_RANGES, TARGET
+
+# Everything the EDA plots need, built in one streamed pass over the dataset.
+# Memory depends on the bin widths and category counts below, never on the
+# number of rows, and every aggregate is an exact count or sum.
+#
+#   histograms    counts on a fixed fine grid spanning NUMERIC_RANGES, plus
+#                 the observed min and max; coarsened to the plotted bins
+#                 afterwards
+#   moments       row count, means and the co-moment matrix of the numeric
+#                 columns, merged chunk by chunk (Chan et al.) so the
+#                 correlations do not suffer from cancellation in raw sums
+#   crosstabs     category x Churn counts from the categorical codes
+
+HISTOGRAM_COLUMNS = ['tenure', 'MonthlyCharges', 'TotalCharges']
+CROSSTAB_COLUMNS = ['Contract', 'InternetService', 'PaymentMethod']
+MOMENT_COLUMNS = list(NUMERIC_DTYPES)
+
+# Fine grid width per histogram column. Each value is counted at the left
+# edge of its grid cell, so plotted bins are off by at most one width.
+HISTOGRAM_BIN_WIDTHS = {
+    'tenure': 1,
+    'MonthlyCharges': 0.05,
+    'TotalCharges': 1.0,
+}
+
+# Only these columns are read from disk
+EDA_COLUMNS = [TARGET] + MOMENT_COLUMNS + CROSSTAB_COLUMNS
+
+class StreamingHistogram:
+    def __init__(self, low, high, width):
+        self.low = low
+        self.width = width
+        self.counts = np.zeros(int(np.floor((high - low) / width)) + 1, dtype=np.int64)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        cells = np.floor((values - self.low) / self.width).astype(np.int64)
+        np.clip(cells, 0, len(self.counts) - 1, out=cells)
+        self.counts += np.bincount(cells, minlength=len(self.counts))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def n(self):
+        return int(self.counts.sum())
+
+    def _cells(self):
+        # Value and count of every non-empty grid cell
+        nonzero = np.flatnonzero(self.counts)
+        return self.low + nonzero * self.width, self.counts[nonzero]
+
+    def binned(self, bins=30):
+        # (counts, edges) over the observed range, like np.histogram
+        values, counts = self._cells()
+        return np.histogram(values, bins=bins, range=(self.min, self.max), weights=counts)
+
+    def kde(self, std, points=200, grid_bins=1024):
+        # Gaussian KDE with Scott's bandwidth, as gaussian_kde would give on
+        # the raw values, evaluated from a grid_bins histogram (binned KDE)
+        grid = np.linspace(self.min, self.max, points)
+        counts, edges = self.binned(grid_bins)
+        centers = (edges[:-1] + edges[1:]) / 2
+        bandwidth = std * self.n ** (-1 / 5)
+        if bandwidth <= 0:
+            return grid, np.zeros(points)
+        z = (grid[:, None] - centers[None, :]) / bandwidth
+        density = (np.exp(-0.5 * z ** 2) @ counts) / (self.n * bandwidth * np.sqrt(2 * np.pi))
+        return grid, density
+
+class StreamingMoments:
+    def __init__(self, columns):
+        self.columns = columns
+        self.n = 0
+        self.mean = np.zeros(len(columns))
+        self.comoment = np.zeros((len(columns), len(columns)))
+
+    def update(self, frame):
+        X = frame[self.columns].to_numpy(dtype=np.float64)
+        n_b = len(X)
+        if n_b == 0:
+            return
+        mean_b = X.mean(axis=0)
+        centered = X - mean_b
+        comoment_b = centered.T @ centered
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * (n_b / n)
+        self.comoment = self.comoment + comoment_b + np.outer(delta, delta) * (self.n * n_b / n)
+        self.n = n
+
+    def std(self):
+        # Sample standard deviation (ddof=1) of each column
+        return pd.Series(np.sqrt(np.diag(self.comoment) / max(self.n - 1, 1)), index=self.columns)
+
+    def corr(self):
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = self.comoment / np.outer(scale, scale)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+class StreamingCrosstab:
+    def __init__(self, column, target=TARGET):
+        self.column = column
+        self.target = target
+        self.counts = np.zeros((len(CATEGORIES[column]), len(CATEGORIES[target])), dtype=np.int64)
+
+    def update(self, frame):
+        # Codes follow the fixed CATEGORIES order (apply_schema guarantees it)
+        rows = frame[self.column].cat.codes.to_numpy(dtype=np.int64)
+        cols = frame[self.target].cat.codes.to_numpy(dtype=np.int64)
+        n_cols = self.counts.shape[1]
+        self.counts += np.bincount(rows * n_cols + cols, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def frame(self):
+        return pd.DataFrame(self.counts, index=pd.Index(CATEGORIES[self.column], name=self.column),
+                            columns=pd.Index(CATEGORIES[self.target], name=self.target))
+
+class EDAAggregates:
+    def __init__(self):
+        self.rows = 0
+        self.target_counts = np.zeros(len(CATEGORIES[TARGET]), dtype=np.int64)
+        self.histograms = {
+            col: StreamingHistogram(*NUMERIC_RANGES[col], HISTOGRAM_BIN_WIDTHS[col])
+            for col in HISTOGRAM_COLUMNS
+        }
+        self.moments = StreamingMoments(MOMENT_COLUMNS)
+        self.crosstabs = {col: StreamingCrosstab(col) for col in CROSSTAB_COLUMNS}
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        self.target_counts += np.bincount(chunk[TARGET].cat.codes.to_numpy(dtype=np.int64),
+                                          minlength=len(self.target_counts))
+        for col, histogram in self.histograms.items():
+            histogram.update(chunk[col].to_numpy())
+        self.moments.update(chunk)
+        for crosstab in self.crosstabs.values():
+            crosstab.update(chunk)
+
+    def target_distribution(self):
+        return pd.Series(self.target_counts, index=pd.Index(CATEGORIES[TARGET], name=TARGET), name='count')
+
+def aggregate_dataset(path, chunk_size=100_000):
+    aggregates = EDAAggregates()
+    start = time.perf_counter()
+    for chunk in iter_dataset(path, columns=EDA_COLUMNS, chunk_size=chunk_size):
+        aggregates.update(chunk)
+    if aggregates.rows == 0:
+        raise ValueError(f"no rows in {path}")
+    print(f"  {aggregates.rows:,} rows aggregated in {time.perf_counter() - start:.1f}s")
+    return aggregates
@@ -1,38 +1,81 @@
 import pandas as pd
 import numpy as np
-import random
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataset import PARQUET_PATH, write_dataset
+from schema import CATEGORIES, NAME_COLUMN, apply_schema
+from customer_names import generate_customer_names
 
-def generate_telecom_data(n_samples=1000):
-    np.random.seed(42)
-    random.seed(42)
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 250_000
+
+# Rows are drawn in fixed blocks of this many rows, each from its own stream
+# (see iter_telecom_chunks). Changing it changes the generated data.
+BLOCK_ROWS = 65_536
+
+DIGITS = np.frombuffer(b"0123456789", dtype=np.uint8)
+LETTERS = np.frombuffer(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", dtype=np.uint8)
+
+def _customer_ids(rng, start, n):
+    # IDs keep the old "NNNN-XXXXX" look: four random digits, then the
+    # global row number written in base 26 with at least five letters.
+    # Encoding the row number keeps IDs unique at any dataset size.
+    rows = np.arange(start, start + n, dtype=np.int64)
+    width = 5
+    while 26 ** width < start + n:
+        width += 1
+
+    buf = np.empty((n, 5 + width), dtype=np.uint8)
+    digits = rng.integers(1000, 10000, n)
+    for i in range(3, -1, -1):
+        buf[:, i] = DIGITS[digits % 10]
+        digits //= 10
+    buf[:, 4] = ord('-')
+    for i in range(4 + width, 4, -1):
+        buf[:, i] = LETTERS[rows % 26]
+        rows //= 26
+
+    return buf.view(f'S{5 + width}').ravel().astype(str)
+
+def _choice(rng, column, n, p=None):
+    # Draw category codes rather than strings; building millions of Python
+    # string objects is what dominated generation time.
+    categories = CATEGORIES[column]
+    codes = rng.choice(len(categories), n, p=p)
+    return pd.Categorical.from_codes(codes, categories)
+
+def _generate_chunk(rng, start, n):
+    tenure = rng.integers(1, 73, n)
+    monthly_charges = rng.uniform(18.25, 118.75, n).round(2)
 
     data = {
-        'customerID': [f'{random.randint(1000,9999)}-{random.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ")*5}' for _ in range(n_samples)],
-        'gender': np.random.choice(['Male', 'Female'], n_samples),
-        'SeniorCitizen': np.random.choice([0, 1], n_samples, p=[0.8, 0.2]),
-        'Partner': np.random.choice(['Yes', 'No'], n_samples),
-        'Dependents': np.random.choice(['Yes', 'No'], n_samples),
-        'tenure': np.random.randint(1, 73, n_samples),
-        'PhoneService': np.random.choice(['Yes', 'No'], n_samples, p=[0.9, 0.1]),
-        'MultipleLines': np.random.choice(['Yes', 'No', 'No phone service'], n_samples),
-        'InternetService': np.random.choice(['DSL', 'Fiber optic', 'No'], n_samples),
-        'OnlineSecurity': np.random.choice(['Yes', 'No', 'No internet service'], n_samples),
-        'OnlineBackup': np.random.choice(['Yes', 'No', 'No internet service'], n_samples),
-        'DeviceProtection': np.random.choice(['Yes', 'No', 'No internet service'], n_samples),
-        'TechSupport': np.random.choice(['Yes', 'No', 'No internet service'], n_samples),
-        'StreamingTV': np.random.choice(['Yes', 'No', 'No internet service'], n_samples),
-        'StreamingMovies': np.random.choice(['Yes', 'No', 'No internet service'], n_samples),
-        'Contract': np.random.choice(['Month-to-month', 'One year', 'Two year'], n_samples),
-        'PaperlessBilling': np.random.choice(['Yes', 'No'], n_samples),
-        'PaymentMethod': np.random.choice(['Electronic check', 'Mailed check', 'Bank transfer (automatic)', 'Credit card (automatic)'], n_samples),
-        'MonthlyCharges': np.random.uniform(18.25, 118.75, n_samples).round(2)
+        'customerID': _customer_ids(rng, start, n),
+        'gender': _choice(rng, 'gender', n),
+        'SeniorCitizen': rng.choice([0, 1], n, p=[0.8, 0.2]),
+        'Partner': _choice(rng, 'Partner', n),
+        'Dependents': _choice(rng, 'Dependents', n),
+        'tenure': tenure,
+        'PhoneService': _choice(rng, 'PhoneService', n, p=[0.9, 0.1]),
+        'MultipleLines': _choice(rng, 'MultipleLines', n),
+        'InternetService': _choice(rng, 'InternetService', n),
+        'OnlineSecurity': _choice(rng, 'OnlineSecurity', n),
+        'OnlineBackup': _choice(rng, 'OnlineBackup', n),
+        'DeviceProtection': _choice(rng, 'DeviceProtection', n),
+        'TechSupport': _choice(rng, 'TechSupport', n),
+        'StreamingTV': _choice(rng, 'StreamingTV', n),
+        'StreamingMovies': _choice(rng, 'StreamingMovies', n),
+        'Contract': _choice(rng, 'Contract', n),
+        'PaperlessBilling': _choice(rng, 'PaperlessBilling', n),
+        'PaymentMethod': _choice(rng, 'PaymentMethod', n),
+        'MonthlyCharges': monthly_charges
     }
 
-    df = pd.DataFrame(data)
-
     # Calculate TotalCharges (approximate based on tenure and monthly charges with some noise)
-    df['TotalCharges'] = df['tenure'] * df['MonthlyCharges'] + np.random.normal(0, 10, n_samples)
-    df['TotalCharges'] = df['TotalCharges'].abs().round(2) # Ensure positive
+    total_charges = tenure * monthly_charges + rng.normal(0, 10, n)
+    data['TotalCharges'] = np.abs(total_charges).round(2) # Ensure positive
 
     # Generate Churn based on some logic to make it learnable
     # Higher probability of churn if:
@@ -40,24 +83,129 @@ def generate_telecom_data(n_samples=1000):
     # - Fiber optic internet
     # - Low tenure
     # - High monthly charges
-    
-    churn_prob = np.zeros(n_samples)
-    churn_prob += np.where(df['Contract'] == 'Month-to-month', 0.4, 0.05)
-    churn_prob += np.where(df['InternetService'] == 'Fiber optic', 0.2, 0.0)
-    churn_prob += np.where(df['tenure'] < 12, 0.2, -0.1)
-    churn_prob += np.where(df['MonthlyCharges'] > 70, 0.1, 0.0)
-    
+
+    churn_prob = np.zeros(n)
+    month_to_month = CATEGORIES['Contract'].index('Month-to-month')
+    fiber_optic = CATEGORIES['InternetService'].index('Fiber optic')
+    churn_prob += np.where(data['Contract'].codes == month_to_month, 0.4, 0.05)
+    churn_prob += np.where(data['InternetService'].codes == fiber_optic, 0.2, 0.0)
+    churn_prob += np.where(tenure < 12, 0.2, -0.1)
+    churn_prob += np.where(monthly_charges > 70, 0.1, 0.0)
+
     # Clip probabilities to [0, 1]
     churn_prob = np.clip(churn_prob, 0, 1)
-    
-    df['Churn'] = [np.random.choice(['Yes', 'No'], p=[p, 1-p]) for p in churn_prob]
 
-    return df
+    # One uniform draw per row replaces a per-row np.random.choice call
+    churned = rng.random(n) < churn_prob
+    churn_codes = np.where(churned, CATEGORIES['Churn'].index('Yes'), CATEGORIES['Churn'].index('No'))
+    data['Churn'] = pd.Categorical.from_codes(churn_codes, CATEGORIES['Churn'])
+
+    # Display names are stored with the data so the dashboard never builds them
+    data[NAME_COLUMN] = generate_customer_names(data['gender'], rng)
+
+    df = pd.DataFrame(data, index=pd.RangeIndex(start, start + n))
+    return apply_schema(df)
+
+def _generate_block(seed, block):
+    # Rows [block * BLOCK_ROWS, (block + 1) * BLOCK_ROWS), from a stream
+    # spawned off `seed` for this block alone
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block,)))
+    return _generate_chunk(rng, block * BLOCK_ROWS, BLOCK_ROWS)
+
+def iter_telecom_chunks(n_samples, chunk_size=DEFAULT_CHUNK_SIZE, seed=DEFAULT_SEED, start=0):
+    # Yields DataFrames of at most chunk_size rows covering rows
+    # [start, start + n_samples). Every block of BLOCK_ROWS rows is generated
+    # whole from its own stream, so a row only depends on `seed` and its row
+    # number: chunk_size, start and n_samples only decide which rows are
+    # returned and how they are split. Memory stays bounded by a chunk plus
+    # a block.
+    end = start + n_samples
+    pending = []
+    pending_rows = 0
+    for block in range(start // BLOCK_ROWS, -(-end // BLOCK_ROWS)):
+        block_start = block * BLOCK_ROWS
+        rows = _generate_block(seed, block).iloc[max(start - block_start, 0):end - block_start]
+        pending.append(rows)
+        pending_rows += len(rows)
+        while pending_rows >= chunk_size or (pending_rows and block_start + BLOCK_ROWS >= end):
+            buffered = pd.concat(pending) if len(pending) > 1 else pending[0]
+            yield buffered.iloc[:chunk_size]
+            pending = [buffered.iloc[chunk_size:]]
+            pending_rows = len(pending[0])
+
+def generate_telecom_data(n_samples=1000, seed=DEFAULT_SEED, chunk_size=DEFAULT_CHUNK_SIZE):
+    chunks = list(iter_telecom_chunks(n_samples, chunk_size, seed))
+    return pd.concat(chunks, ignore_index=True)
+
+def write_telecom_data(output_path, n_samples, chunk_size=DEFAULT_CHUNK_SIZE, seed=DEFAULT_SEED, start=0):
+    # Each chunk is written as soon as it is generated; the file extension
+    # picks the format (.parquet for the columnar dataset, otherwise CSV)
+    chunks = iter_telecom_chunks(n_samples, chunk_size, seed, start)
+    return write_dataset(chunks, output_path)
+
+def shard_bounds(n_samples, n_shards):
+    # Contiguous (start, count) row ranges; the first shards take the remainder
+    base, extra = divmod(n_samples, n_shards)
+    bounds = []
+    start = 0
+    for i in range(n_shards):
+        count = base + (1 if i < extra else 0)
+        bounds.append((start, count))
+        start += count
+    return bounds
+
+def generate_sharded(output_dir, n_samples, n_shards, seed=DEFAULT_SEED, chunk_size=DEFAULT_CHUNK_SIZE, processes=None, fmt='parquet'):
+    # Each shard generates its own row range of the same dataset, so the
+    # partitions read back in order hold exactly the rows a single-file run
+    # with the same seed writes, whatever the number of shards or worker
+    # processes.
+    os.makedirs(output_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(output_dir, 'part-*.*')):
+        os.remove(stale)
+
+    # With more shards than rows the trailing shards are empty; they get no
+    # file, so every returned path exists
+    shards = [
+        (os.path.join(output_dir, f'part-{i:05d}.{fmt}'), start, count)
+        for i, (start, count) in enumerate(shard_bounds(n_samples, n_shards))
+        if count > 0
+    ]
+    paths = [path for path, _, _ in shards]
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [
+            pool.submit(write_telecom_data, path, count, chunk_size, seed, start)
+            for path, start, count in shards
+        ]
+        rows = sum(f.result() for f in futures)
+
+    return paths, rows
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic telecom churn data")
+    parser.add_argument('--rows', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--shards', type=int, default=1,
+                        help="Split the rows into this many partition files generated in parallel")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="Worker processes for sharded generation (default: all cores)")
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet',
+                        help="Partition file format when --shards > 1")
+    parser.add_argument('--output', default=None,
+                        help="Output file (.parquet or .csv), or output directory when --shards > 1")
+    args = parser.parse_args()
+
     print("Generating synthetic telecom churn data...")
-    df = generate_telecom_data(3000)
-    output_path = 'data/telecom_churn.csv'
-    df.to_csv(output_path, index=False)
-    print(f"Data saved to {output_path}")
-    print(df.head())
+    start = time.perf_counter()
+    if args.shards > 1:
+        output = args.output or 'data/telecom_churn_shards'
+        paths, rows = generate_sharded(output, args.rows, args.shards, args.seed,
+                                       args.chunk_size, args.processes, args.format)
+        output = f"{len(paths)} partitions in {output}"
+    else:
+        output = args.output or PARQUET_PATH
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        rows = write_telecom_data(output, args.rows, args.chunk_size, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"{rows:,} rows saved to {output} in {elapsed:.1f}s")
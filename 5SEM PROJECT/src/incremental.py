@@ -0,0 +1,128 @@
+import pandas as pd
+import numpy as np
+import time
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import log_loss
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from dataset import iter_dataset
+from schema import CATEGORICAL_FEATURES, FEATURE_COLUMNS, ID_COLUMN, NUMERICAL_FEATURES, TARGET
+
+# Out-of-core training: the dataset is only ever read one chunk at a time, so
+# memory is bounded by chunk_size rather than by the number of rows.
+#
+#   pass 1        StandardScaler.partial_fit and the category vocabularies
+#   passes 2..    averaged SGD logistic regression, partial_fit chunk by
+#                 chunk
+#   final pass    metrics on the held-out rows
+#
+# Rows are assigned to the hold-out set by a hash of their customerID, so the
+# split is the same on every pass without storing it.
+
+HOLDOUT_PERCENT = 20
+CLASSES = np.array([0, 1])
+
+def _holdout_mask(chunk, holdout_percent=HOLDOUT_PERCENT):
+    hashes = pd.util.hash_pandas_object(chunk[ID_COLUMN], index=False).values
+    return (hashes % 100) < holdout_percent
+
+def _target(chunk):
+    # Same encoding as LabelEncoder in train_model: No -> 0, Yes -> 1
+    return (chunk[TARGET] == 'Yes').to_numpy(dtype=np.int64)
+
+def _chunks(data_path, chunk_size):
+    return iter_dataset(data_path, columns=[ID_COLUMN] + FEATURE_COLUMNS + [TARGET], chunk_size=chunk_size)
+
+def fit_preprocessor(data_path, chunk_size=100_000):
+    # Pass 1: streamed scaler statistics and the categories actually present
+    scaler = StandardScaler()
+    vocabularies = {col: set() for col in CATEGORICAL_FEATURES}
+    sample = None
+    rows = 0
+    for chunk in _chunks(data_path, chunk_size):
+        train = chunk[~_holdout_mask(chunk)]
+        if len(train) == 0:
+            continue
+        scaler.partial_fit(train[NUMERICAL_FEATURES])
+        for col in CATEGORICAL_FEATURES:
+            vocabularies[col].update(train[col].unique())
+        if sample is None:
+            sample = train.head(1000)
+        rows += len(train)
+    if sample is None:
+        raise ValueError(f"no training rows in {data_path}")
+
+    # Same layout as the in-memory preprocessor so the saved pipeline looks
+    # like any other. It is fitted on a small sample for the column
+    # bookkeeping, then the scaler takes the statistics from the full pass.
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('num', Pipeline(steps=[('scaler', StandardScaler())]), NUMERICAL_FEATURES),
+            ('cat', Pipeline(steps=[('onehot', OneHotEncoder(
+                categories=[sorted(vocabularies[col]) for col in CATEGORICAL_FEATURES],
+                handle_unknown='ignore'))]), CATEGORICAL_FEATURES)
+        ])
+    preprocessor.fit(sample[FEATURE_COLUMNS])
+    fitted_scaler = preprocessor.named_transformers_['num'].named_steps['scaler']
+    for attr in ('mean_', 'var_', 'scale_', 'n_samples_seen_'):
+        setattr(fitted_scaler, attr, getattr(scaler, attr))
+    return preprocessor, rows
+
+def evaluate(pipeline, data_path, chunk_size=100_000):
+    # Streamed hold-out metrics: only running counts are kept
+    correct = 0
+    total = 0
+    loss_sum = 0.0
+    confusion = np.zeros((2, 2), dtype=np.int64)
+    for chunk in _chunks(data_path, chunk_size):
+        holdout = chunk[_holdout_mask(chunk)]
+        if len(holdout) == 0:
+            continue
+        y = _target(holdout)
+        proba = pipeline.predict_proba(holdout[FEATURE_COLUMNS])
+        y_pred = pipeline.classes_[proba.argmax(axis=1)]
+        correct += int((y_pred == y).sum())
+        total += len(y)
+        loss_sum += log_loss(y, proba, labels=CLASSES) * len(y)
+        np.add.at(confusion, (y, y_pred), 1)
+    if total == 0:
+        raise ValueError(f"no hold-out rows in {data_path}")
+    return {
+        'rows': total,
+        'accuracy': correct / total,
+        'log_loss': loss_sum / total,
+        'confusion_matrix': confusion.tolist(),
+    }
+
+def train_out_of_core(data_path, epochs=5, chunk_size=100_000, random_state=42):
+    start = time.perf_counter()
+    print("Pass 1: scaler statistics and category vocabularies...")
+    preprocessor, rows = fit_preprocessor(data_path, chunk_size)
+    print(f"  {rows:,} training rows in {time.perf_counter() - start:.1f}s")
+
+    # Averaged SGD with a small constant step. The default 'optimal' schedule
+    # takes huge early steps on standardized one-hot data (probabilities down
+    # to 1e-79 on the shipped 3,000 rows); averaging the iterates converges
+    # to what LogisticRegression finds on the same split: hold-out log loss
+    # 0.436 vs 0.435 on the shipped data, 0.439 vs 0.439 on 300k rows.
+    classifier = SGDClassifier(loss='log_loss', alpha=1e-4, learning_rate='constant', eta0=0.01,
+                               average=True, random_state=random_state)
+    rng = np.random.default_rng(random_state)
+    for epoch in range(epochs):
+        epoch_start = time.perf_counter()
+        for chunk in _chunks(data_path, chunk_size):
+            train = chunk[~_holdout_mask(chunk)]
+            if len(train) == 0:
+                continue
+            # Shuffle within the chunk; chunks themselves arrive in file order
+            train = train.iloc[rng.permutation(len(train))]
+            classifier.partial_fit(preprocessor.transform(train[FEATURE_COLUMNS]), _target(train), classes=CLASSES)
+        print(f"Epoch {epoch + 1}/{epochs} in {time.perf_counter() - epoch_start:.1f}s")
+
+    pipeline = Pipeline(steps=[('preprocessor', preprocessor), ('classifier', classifier)])
+    metrics = evaluate(pipeline, data_path, chunk_size)
+    print(f"Hold-out ({metrics['rows']:,} rows): accuracy {metrics['accuracy']:.4f}, "
+          f"log loss {metrics['log_loss']:.4f}")
+    print(f"Confusion matrix: {metrics['confusion_matrix']}")
+    return pipeline, metrics
@@ -0,0 +1,187 @@
+import numpy as np
+import argparse
+import json
+import os
+import shutil
+import time
+from dataset import dataset_fingerprint, default_data_path, iter_dataset
+from eda_aggregates import StreamingMoments
+from schema import (CATEGORICAL_FEATURES, CATEGORIES, FEATURE_COLUMNS, ID_COLUMN, NUMERICAL_FEATURES, TARGET,
+                    apply_schema, records_to_frame)
+
+LOOKALIKE_DIR = 'models/lookalike'
+FORMAT_VERSION = 2
+METADATA_FILE = 'metadata.json'
+CHURN_LABEL = 'Yes'
+ARRAYS = ('numeric_mean', 'numeric_std', 'features', 'sq_norms', 'churned', 'customer_ids')
+
+# Nearest-neighbour index over a fixed encoding of the 19 features that does
+# not depend on the model: numeric columns standardized with the dataset's
+# mean and standard deviation, categoricals one-hot over the CATEGORIES
+# lists. One-hot entries are sqrt(1/2), so a different category adds 1 to
+# the squared distance, the same as one standard deviation on a numeric
+# column. (The model's own preprocessor is no good here: the hist engine
+# passes raw numerics and ordinal codes, so distances would be almost all
+# TotalCharges.)
+#
+# Every customer in the dataset is stored encoded as a float32 matrix in
+# .npy files that are memory-mapped on load. The matrix is stored
+# feature-major (features x customers), which makes the product with a
+# query vector a streaming pass over memory and about twice as fast as the
+# row-major layout.
+#
+# A query is one brute-force pass: squared Euclidean distances from
+# ||x||^2 - 2 X.q + ||q||^2 with the row norms precomputed, then
+# argpartition for the top k. That is a single matrix-vector product, tens
+# of milliseconds for a million customers on one core. Rows are in dataset
+# file order, so a result row is also the customer's position in the
+# dashboard's frame.
+#
+# The index is rebuilt whenever the dataset changes.
+
+ONE_HOT_VALUE = np.sqrt(0.5)
+ENCODED_WIDTH = len(NUMERICAL_FEATURES) + sum(len(CATEGORIES[col]) for col in CATEGORICAL_FEATURES)
+
+def encode_frame(frame, numeric_mean, numeric_std):
+    # (rows, ENCODED_WIDTH) float32; frame must have the schema's dtypes
+    n = len(frame)
+    encoded = np.zeros((n, ENCODED_WIDTH), dtype=np.float32)
+    numeric = frame[NUMERICAL_FEATURES].to_numpy(dtype=np.float64)
+    encoded[:, :len(NUMERICAL_FEATURES)] = (numeric - numeric_mean) / numeric_std
+    offset = len(NUMERICAL_FEATURES)
+    rows = np.arange(n)
+    for col in CATEGORICAL_FEATURES:
+        encoded[rows, offset + frame[col].cat.codes.to_numpy(dtype=np.int64)] = ONE_HOT_VALUE
+        offset += len(CATEGORIES[col])
+    return encoded
+
+class LookalikeIndex:
+    def __init__(self, numeric_mean, numeric_std, features, sq_norms, churned, customer_ids, metadata=None):
+        self.numeric_mean = numeric_mean
+        self.numeric_std = numeric_std
+        self.features = features
+        self.sq_norms = sq_norms
+        self.churned = churned
+        self.customer_ids = customer_ids
+        self.metadata = metadata or {}
+
+    def __len__(self):
+        return self.features.shape[1]
+
+    @classmethod
+    def build(cls, data_path, chunk_size=100_000):
+        # One pass: chunks are encoded with raw numerics while their moments
+        # are accumulated, and the numeric rows standardized at the end
+        moments = StreamingMoments(NUMERICAL_FEATURES)
+        raw_mean, raw_std = np.zeros(len(NUMERICAL_FEATURES)), np.ones(len(NUMERICAL_FEATURES))
+        features, churned, customer_ids = [], [], []
+        for chunk in iter_dataset(data_path, columns=[ID_COLUMN] + FEATURE_COLUMNS + [TARGET],
+                                  chunk_size=chunk_size):
+            moments.update(chunk)
+            features.append(encode_frame(chunk, raw_mean, raw_std))
+            churned.append((chunk[TARGET] == CHURN_LABEL).to_numpy(dtype=np.int8))
+            customer_ids.append(chunk[ID_COLUMN].to_numpy(dtype=str))
+        if not features:
+            raise ValueError(f"no rows in {data_path}")
+        numeric_mean = moments.mean
+        numeric_std = moments.std().to_numpy()
+        numeric_std[~(numeric_std > 0)] = 1.0  # constant columns add nothing
+        features = np.ascontiguousarray(np.vstack(features).T)
+        numeric = slice(0, len(NUMERICAL_FEATURES))
+        features[numeric] = (features[numeric] - numeric_mean[:, None]) / numeric_std[:, None]
+        sq_norms = np.einsum('ij,ij->j', features, features)
+        return cls(numeric_mean, numeric_std, features, sq_norms,
+                   np.concatenate(churned), np.concatenate(customer_ids))
+
+    def save(self, path, metadata):
+        # Written to a temporary directory and swapped in, like artifact.py
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name in ARRAYS:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(self, name))
+        self.metadata = dict(metadata, rows=len(self), encoded_features=int(self.features.shape[0]))
+        with open(os.path.join(tmp_path, METADATA_FILE), 'w') as f:
+            json.dump(self.metadata, f, indent=2)
+
+        old_path = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAYS
+        }
+        return cls(metadata=metadata, **arrays)
+
+    def encode(self, records):
+        return encode_frame(apply_schema(records_to_frame(records)), self.numeric_mean, self.numeric_std)
+
+    def query_encoded(self, q, k=10, exclude=None):
+        # (rows, distances) of the k nearest customers, nearest first.
+        # exclude is a row to leave out, e.g. the customer being looked at.
+        q = np.asarray(q, dtype=np.float32)
+        distances = q @ self.features
+        distances *= -2
+        distances += self.sq_norms
+        distances += q @ q
+        if exclude is not None:
+            distances[exclude] = np.inf
+        k = min(k, len(distances) - (exclude is not None))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        rows = np.argpartition(distances, k - 1)[:k]
+        rows = rows[np.argsort(distances[rows], kind='stable')]
+        return rows, np.sqrt(np.maximum(distances[rows], 0))
+
+    def query(self, record, k=10, exclude=None):
+        return self.query_encoded(self.encode([record])[0], k, exclude)
+
+def load_or_build(data_path=None, index_dir=LOOKALIKE_DIR, chunk_size=100_000):
+    # The persisted index when it matches the dataset, otherwise a freshly
+    # built (and saved) one
+    data_path = default_data_path() if data_path is None else data_path
+    expected = {
+        'format_version': FORMAT_VERSION,
+        'data_path': os.path.abspath(data_path),
+        'data_fingerprint': dataset_fingerprint(data_path),
+    }
+    try:
+        index = LookalikeIndex.load(index_dir)
+        if all(index.metadata.get(key) == value for key, value in expected.items()):
+            return index
+    except (FileNotFoundError, ValueError):
+        pass
+
+    start = time.perf_counter()
+    index = LookalikeIndex.build(data_path, chunk_size)
+    index.save(index_dir, expected)
+    print(f"Lookalike index: {len(index):,} customers x {index.features.shape[0]} features "
+          f"built in {time.perf_counter() - start:.1f}s")
+    return LookalikeIndex.load(index_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the lookalike index, or find a customer's nearest lookalikes")
+    parser.add_argument('--data', default=default_data_path())
+    parser.add_argument('--output', default=LOOKALIKE_DIR)
+    parser.add_argument('--customer', help="customerID to find lookalikes for")
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    index = load_or_build(args.data, args.output)
+    if args.customer:
+        matches = np.flatnonzero(index.customer_ids == args.customer)
+        if len(matches) == 0:
+            raise ValueError(f"unknown customer {args.customer!r}")
+        row = int(matches[0])
+        start = time.perf_counter()
+        rows, distances = index.query_encoded(np.asarray(index.features[:, row]), args.k, exclude=row)
+        print(f"{len(rows)} lookalikes in {(time.perf_counter() - start) * 1000:.1f} ms")
+        for r, d in zip(rows, distances):
+            print(f"  {index.customer_ids[r]}  distance {d:.3f}  churned {'Yes' if index.churned[r] else 'No'}")
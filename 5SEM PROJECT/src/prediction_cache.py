@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+from schema import FEATURE_COLUMNS, NUMERICAL_FEATURES
+
+DEFAULT_MAXSIZE = 100_000
+
+class PredictionCache:
+    # Bounded LRU cache of model outputs keyed on the canonical feature tuple.
+    # Numeric features are rounded to `decimals` places so float32/float64 or
+    # form-widget noise on the same customer maps to one entry. A cache holds
+    # the outputs of one model: whoever swaps the model in also replaces or
+    # clears the cache, so entries are never recomputed with a stale model.
+    # Safe to share between threads (Streamlit sessions, server worker
+    # threads).
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, decimals=2):
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self._numeric_mask = [col in NUMERICAL_FEATURES for col in FEATURE_COLUMNS]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, record):
+        return self.key_for_row([record[col] for col in FEATURE_COLUMNS])
+
+    def key_for_row(self, values):
+        # values are the features in FEATURE_COLUMNS order, e.g. a row from
+        # DataFrame.itertuples(index=False, name=None)
+        return tuple(
+            round(float(value), self.decimals) if numeric else value
+            for value, numeric in zip(values, self._numeric_mask)
+        )
+
+    def get(self, record, key=None):
+        key = self.key(record) if key is None else key
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, record, value, key=None):
+        key = self.key(record) if key is None else key
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, record, compute):
+        key = self.key(record)
+        value = self.get(record, key)
+        if value is None:
+            value = compute(record)
+            self.put(record, value, key)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+class CachedScorer:
+    # Drop-in for FastScorer/PipelineScorer that consults the cache first
+    def __init__(self, scorer, cache):
+        self.scorer = scorer
+        self.cache = cache
+        self.classes_ = scorer.classes_
+
+    def score(self, record):
+        return self.cache.get_or_compute(record, self.scorer.score)
@@ -0,0 +1,97 @@
+import argparse
+import os
+import shutil
+from artifact import is_artifact, read_metadata, save_artifact
+
+REGISTRY_DIR = 'models/registry'
+VERSIONS_DIR = 'versions'
+CURRENT_FILE = 'CURRENT'
+
+# Local model registry:
+#
+#   models/registry/versions/<model version>/   one artifact directory each
+#   models/registry/CURRENT                      the version being served
+#
+# CURRENT is only ever replaced with os.replace, so readers see either the old
+# or the new version and never a partial write. Publishing a version does not
+# touch the running services; activating it does, and they pick it up on
+# their next check.
+
+class ModelRegistry:
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+        self.versions_dir = os.path.join(root, VERSIONS_DIR)
+        self.current_file = os.path.join(root, CURRENT_FILE)
+
+    def version_path(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def versions(self):
+        # Published versions, oldest first
+        if not os.path.isdir(self.versions_dir):
+            return []
+        found = []
+        for name in os.listdir(self.versions_dir):
+            path = self.version_path(name)
+            if is_artifact(path):
+                found.append((read_metadata(path)['created'], name))
+        return [name for _, name in sorted(found)]
+
+    def current_version(self):
+        try:
+            with open(self.current_file) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current_path(self):
+        version = self.current_version()
+        return None if version is None else self.version_path(version)
+
+    def publish(self, pipeline, metrics=None, data_hash=None, target_classes=None, activate=True):
+        # Saves the pipeline as a new version and returns its metadata. The
+        # directory name is the content hash, so republishing an identical
+        # model is a no-op.
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging = os.path.join(self.versions_dir, f".staging-{os.getpid()}")
+        metadata = save_artifact(pipeline, staging, metrics, data_hash, target_classes)
+        path = self.version_path(metadata['model_version'])
+        if is_artifact(path):
+            shutil.rmtree(staging)
+        else:
+            os.replace(staging, path)
+        if activate:
+            self.activate(metadata['model_version'])
+        return metadata
+
+    def activate(self, version):
+        # Points CURRENT at an already published version (also used to roll back)
+        if not is_artifact(self.version_path(version)):
+            raise ValueError(f"unknown model version {version!r}")
+        tmp_file = f"{self.current_file}.tmp-{os.getpid()}"
+        with open(tmp_file, 'w') as f:
+            f.write(version + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.current_file)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List published churn models or change the one being served")
+    parser.add_argument('--root', default=REGISTRY_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list')
+    activate = commands.add_parser('activate')
+    activate.add_argument('version')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'list':
+        current = registry.current_version()
+        for version in registry.versions():
+            metadata = read_metadata(registry.version_path(version))
+            marker = '*' if version == current else ' '
+            print(f"{marker} {version}  {metadata['created']}  {metadata['classifier']}  "
+                  f"{metadata['metrics'].get('best_score', '')}")
+    else:
+        registry.activate(args.version)
+        print(f"Now serving model {args.version}")
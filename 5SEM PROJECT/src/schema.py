@@ -0,0 +1,120 @@
+import pandas as pd
+import numpy as np
+
+# Fixed category sets for every string column. The order matches the option
+# lists the generator draws from, so category codes mean the same thing in
+# every file and every process.
+YES_NO = ['Yes', 'No']
+INTERNET_ADDON = ['Yes', 'No', 'No internet service']
+
+CATEGORIES = {
+    'gender': ['Male', 'Female'],
+    'Partner': YES_NO,
+    'Dependents': YES_NO,
+    'PhoneService': YES_NO,
+    'MultipleLines': ['Yes', 'No', 'No phone service'],
+    'InternetService': ['DSL', 'Fiber optic', 'No'],
+    'OnlineSecurity': INTERNET_ADDON,
+    'OnlineBackup': INTERNET_ADDON,
+    'DeviceProtection': INTERNET_ADDON,
+    'TechSupport': INTERNET_ADDON,
+    'StreamingTV': INTERNET_ADDON,
+    'StreamingMovies': INTERNET_ADDON,
+    'Contract': ['Month-to-month', 'One year', 'Two year'],
+    'PaperlessBilling': YES_NO,
+    'PaymentMethod': ['Electronic check', 'Mailed check', 'Bank transfer (automatic)', 'Credit card (automatic)'],
+    'Churn': ['No', 'Yes'],
+}
+
+NUMERIC_DTYPES = {
+    'SeniorCitizen': 'int8',
+    'tenure': 'int16',
+    'MonthlyCharges': 'float32',
+    'TotalCharges': 'float32',
+}
+
+# Inclusive bounds checked at load time
+NUMERIC_RANGES = {
+    'SeniorCitizen': (0, 1),
+    'tenure': (0, 1200),
+    'MonthlyCharges': (0, 10_000),
+    'TotalCharges': (0, 1_000_000),
+}
+
+ID_COLUMN = 'customerID'
+TARGET = 'Churn'
+
+# Optional display-name column stored next to the 21 columns (see customer_names.py)
+NAME_COLUMN = 'CustomerName'
+
+# The 21 dataset columns in file order
+COLUMNS = [
+    'customerID', 'gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure',
+    'PhoneService', 'MultipleLines', 'InternetService', 'OnlineSecurity',
+    'OnlineBackup', 'DeviceProtection', 'TechSupport', 'StreamingTV',
+    'StreamingMovies', 'Contract', 'PaperlessBilling', 'PaymentMethod',
+    'MonthlyCharges', 'TotalCharges', 'Churn'
+]
+FEATURE_COLUMNS = [c for c in COLUMNS if c not in (ID_COLUMN, TARGET)]
+CATEGORICAL_FEATURES = [c for c in FEATURE_COLUMNS if c in CATEGORIES]
+NUMERICAL_FEATURES = [c for c in FEATURE_COLUMNS if c in NUMERIC_DTYPES]
+
+ID_DTYPE = pd.StringDtype('pyarrow')
+
+DTYPES = {ID_COLUMN: ID_DTYPE}
+DTYPES.update({col: pd.CategoricalDtype(cats) for col, cats in CATEGORIES.items()})
+DTYPES.update(NUMERIC_DTYPES)
+
+# What pandas.read_csv should parse each column as. Categoricals are parsed
+# with inferred categories so unknown values can still be reported.
+CSV_DTYPES = dict(DTYPES)
+CSV_DTYPES.update({col: 'category' for col in CATEGORIES})
+CSV_DTYPES[NAME_COLUMN] = 'category'
+
+def apply_schema(df, required=None):
+    # Validates df against the schema and casts every known column to its
+    # compact dtype. Columns the schema does not know about pass through.
+    missing = [c for c in (required or []) if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    casts = {}
+    for col in df.columns:
+        if col not in DTYPES:
+            continue
+        series = df[col]
+        if series.isna().any():
+            raise ValueError(f"Column '{col}' contains missing values")
+
+        if col in CATEGORIES:
+            allowed = CATEGORIES[col]
+            values = series.cat.categories if isinstance(series.dtype, pd.CategoricalDtype) else series.unique()
+            unknown = sorted(set(values) - set(allowed))
+            if unknown:
+                raise ValueError(f"Column '{col}' has unknown values {unknown}; expected {allowed}")
+        elif col in NUMERIC_RANGES:
+            low, high = NUMERIC_RANGES[col]
+            if series.min() < low or series.max() > high:
+                raise ValueError(f"Column '{col}' is outside the range [{low}, {high}]")
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Unordered categorical dtypes compare equal whatever the category
+            # order, so recode explicitly to keep codes identical everywhere
+            if list(series.cat.categories) != CATEGORIES[col]:
+                casts[col] = series.cat.set_categories(CATEGORIES[col])
+        elif series.dtype != DTYPES[col]:
+            casts[col] = series.astype(DTYPES[col])
+
+    if casts:
+        df = df.assign(**casts)
+    return df
+
+def records_to_frame(records, columns=FEATURE_COLUMNS):
+    # Builds a model-ready frame from already validated plain dicts. Numeric
+    # columns get their schema dtypes so predictions match frames from
+    # apply_schema; categoricals stay plain strings, which skips the
+    # per-column categorical casts that dominate on small frames.
+    return pd.DataFrame({
+        col: np.array([record[col] for record in records], dtype=NUMERIC_DTYPES.get(col, object))
+        for col in columns
+    })
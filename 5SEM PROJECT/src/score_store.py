@@ -0,0 +1,76 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import time
+from batch_score import score_chunks
+from dataset import default_data_path, iter_dataset, write_dataset
+from schema import FEATURE_COLUMNS, ID_COLUMN
+from scoring import default_model_path, load_serving_model, model_version
+
+SCORE_STORE_PATH = 'models/churn_scores.parquet'
+
+# Churn probability and risk tier for every customer in the dataset, computed
+# once when the model is built. Each row carries the version of the model
+# that produced it so a store left over from an older model is never served.
+
+def build_score_store(model, data_path, output_path=SCORE_STORE_PATH, version=None, chunk_size=100_000):
+    version = model_version() if version is None else version
+    stats = {'rows': 0, 'score_seconds': 0.0, 'start': time.perf_counter()}
+
+    def tagged(frames):
+        for frame in frames:
+            frame['model_version'] = pd.Categorical([version] * len(frame))
+            yield frame
+
+    chunks = iter_dataset(data_path, columns=[ID_COLUMN] + FEATURE_COLUMNS, chunk_size=chunk_size)
+    write_dataset(tagged(score_chunks(model, chunks, stats)), output_path)
+    return stats['rows']
+
+class ScoreStore:
+    # customerID -> (churn probability, risk tier) through a hash index
+
+    def __init__(self, customer_ids, probabilities, tiers, version):
+        self.version = version
+        self._probabilities = np.asarray(probabilities, dtype=float)
+        self._tiers = np.asarray(tiers, dtype=object)
+        self._lookup = pd.Index(np.asarray(customer_ids, dtype=str))
+        self._lookup.is_unique  # builds the hash table now, not on the first lookup
+
+    def __len__(self):
+        return len(self._probabilities)
+
+    @classmethod
+    def load(cls, path=SCORE_STORE_PATH, version=None):
+        # Returns None when there is no store or it was built by a different
+        # model than `version`
+        if not os.path.exists(path):
+            return None
+        df = pd.read_parquet(path)
+        versions = df['model_version'].unique()
+        if len(versions) != 1 or (version is not None and versions[0] != version):
+            return None
+        return cls(df[ID_COLUMN], df['churn_probability'], df['risk_tier'], str(versions[0]))
+
+    def get(self, customer_id):
+        try:
+            row = self._lookup.get_loc(customer_id)
+        except KeyError:
+            return None
+        if not isinstance(row, (int, np.integer)):
+            return None  # repeated IDs are ambiguous, score those live
+        return float(self._probabilities[row]), self._tiers[row]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute churn scores for every customer in the dataset")
+    parser.add_argument('--data', default=default_data_path())
+    parser.add_argument('--model', default=default_model_path())
+    parser.add_argument('--output', default=SCORE_STORE_PATH)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        print("Data file not found!")
+    else:
+        version = model_version(args.model)
+        rows = build_score_store(load_serving_model(args.model), args.data, args.output, version)
+        print(f"{rows:,} scores from model {version} saved to {args.output}")
@@ -0,0 +1,309 @@
+import pandas as pd
+import numpy as np
+import joblib
+import os
+import threading
+import time
+from scipy.special import expit
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from artifact import METADATA_FILE, file_hash, is_artifact, load_artifact, read_metadata
+from registry import ModelRegistry
+from schema import NUMERIC_DTYPES, records_to_frame
+
+MODEL_PATH = 'models/churn_model'
+LEGACY_MODEL_PATH = 'models/best_churn_model.pkl'
+
+# Risk tiers used by the dashboard and every scorer: a customer falls in the
+# first tier whose threshold their churn probability is strictly above.
+RISK_TIERS = [
+    (0.65, 'CRITICAL'),
+    (0.40, 'HIGH'),
+    (0.25, 'MEDIUM'),
+]
+LOW_TIER = 'LOW'
+TIER_NAMES = [LOW_TIER] + [name for _, name in reversed(RISK_TIERS)]
+
+def default_model_path():
+    # The registry's current version when there is one, otherwise a plain
+    # artifact directory, otherwise the single pickle older runs wrote
+    current = ModelRegistry().current_path()
+    if current is not None:
+        return current
+    if os.path.exists(MODEL_PATH) or not os.path.exists(LEGACY_MODEL_PATH):
+        return MODEL_PATH
+    return LEGACY_MODEL_PATH
+
+def model_stamp(path):
+    # Cheap change detector for a saved model: its path plus the inode, size
+    # and mtime of the file that is rewritten whenever the model changes
+    target = os.path.join(path, METADATA_FILE) if os.path.isdir(path) else path
+    try:
+        stat = os.stat(target)
+    except FileNotFoundError:
+        return (path, None)
+    return (path, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+class ModelWatcher:
+    # Keeps whatever `load(path)` builds for the current model and rebuilds
+    # it when the model changes: a new registry version being activated, or
+    # an explicit path being rewritten. Checks cost one stat at most every
+    # check_interval seconds. The swap is a single reference assignment, so
+    # callers still holding the previous value finish with it undisturbed.
+    # A model that fails to load (e.g. still being written) is reported and
+    # the previous one kept; the next check tries again.
+
+    def __init__(self, load, path=None, check_interval=1.0):
+        self.load = load
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = float('-inf')
+        self._stamp = None
+        self._state = (None, None)
+        self.reloads = 0
+
+    @property
+    def version(self):
+        return self._state[1]
+
+    def current(self):
+        return self.current_with_version()[0]
+
+    def current_with_version(self):
+        # (value, model version) as one consistent pair
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            with self._lock:
+                if now - self._checked >= self.check_interval:
+                    self._refresh()
+                    self._checked = now
+        return self._state
+
+    def _refresh(self):
+        path = default_model_path() if self.path is None else self.path
+        stamp = model_stamp(path)
+        if stamp == self._stamp:
+            return
+        try:
+            # The version is read before the load and the stamp checked again
+            # after it, so a model rewritten in between is not paired with
+            # the wrong version; the next check loads it again
+            version = model_version(path)
+            value = self.load(path)
+            if model_stamp(path) != stamp and self._state[0] is not None:
+                return
+        except Exception as e:
+            if self._state[0] is None:
+                raise
+            print(f"Could not load model {path} ({type(e).__name__}: {e}); "
+                  f"still serving version {self.version}")
+            return
+        self._state = (value, version)
+        if self._stamp is not None:
+            self.reloads += 1
+        self._stamp = stamp
+
+def load_model(path=None):
+    # The full fitted Pipeline, from an artifact directory or a pickle
+    path = default_model_path() if path is None else path
+    if is_artifact(path):
+        return load_artifact(path).pipeline
+    return joblib.load(path)
+
+def load_serving_model(path=None):
+    # Model for batch scoring: the artifact's CompiledModel where possible,
+    # which scores from memory-mapped arrays shared by every process
+    path = default_model_path() if path is None else path
+    if is_artifact(path):
+        return load_artifact(path).model
+    return joblib.load(path)
+
+def model_version(path=None):
+    # Content hash of the saved model; anything derived from a model
+    # (stored scores, caches) is tagged with it
+    path = default_model_path() if path is None else path
+    if is_artifact(path):
+        return read_metadata(path)['model_version']
+    return file_hash(path)
+
+def churn_class_index(model):
+    # Training encodes the target with LabelEncoder, so churn ("Yes") is 1
+    return list(model.classes_).index(1)
+
+def risk_tier(prob):
+    for threshold, name in RISK_TIERS:
+        if prob > threshold:
+            return name
+    return LOW_TIER
+
+def risk_tiers(probs):
+    # Vectorized risk_tier, returned as a categorical over TIER_NAMES
+    probs = np.asarray(probs)
+    conditions = [probs > threshold for threshold, _ in RISK_TIERS]
+    names = np.select(conditions, [name for _, name in RISK_TIERS], LOW_TIER)
+    return pd.Categorical(names, categories=TIER_NAMES)
+
+def unwrap_transformer(transformer):
+    # ColumnTransformer entries are usually one-step Pipelines
+    while isinstance(transformer, Pipeline) and len(transformer.steps) == 1:
+        transformer = transformer.steps[0][1]
+    return transformer
+
+def _float32(value):
+    return float(np.float32(value))
+
+class PipelineScorer:
+    # Generic single-record scorer: one DataFrame, one predict_proba call.
+    # Used for any pipeline FastScorer cannot compile.
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.classes_ = pipeline.classes_
+        self._churn_idx = churn_class_index(pipeline)
+
+    def predict_proba_one(self, record):
+        return self.pipeline.predict_proba(records_to_frame([record]))[0]
+
+    def score(self, record):
+        # (predicted class, churn probability) from a single pass
+        proba = self.predict_proba_one(record)
+        return self.classes_[int(np.argmax(proba))], float(proba[self._churn_idx])
+
+class FastScorer(PipelineScorer):
+    # Scores a plain dict without pandas or the sklearn Pipeline. The fitted
+    # StandardScaler constants and a (column, value) -> one-hot position map
+    # are extracted once, and the classifier is replaced by plain-Python
+    # arithmetic or tree walks over lists. Results match
+    # pipeline.predict_proba(apply_schema(DataFrame([record]))), including
+    # the float32 rounding the schema dtypes and sklearn trees introduce.
+
+    def __init__(self, pipeline):
+        super().__init__(pipeline)
+        preprocessor = pipeline.named_steps['preprocessor']
+        classifier = pipeline.named_steps['classifier']
+        if not isinstance(preprocessor, ColumnTransformer) or getattr(preprocessor, 'sparse_output_', False):
+            raise ValueError("FastScorer needs a dense ColumnTransformer preprocessor")
+
+        self._numeric = []   # (column, output position, mean, scale, float32 block)
+        self._onehot = {}    # (column, value) -> output position
+        self._categorical_columns = []
+        position = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if name == 'remainder':
+                if transformer != 'drop':
+                    raise ValueError("FastScorer does not support passthrough columns")
+                continue
+            transformer = unwrap_transformer(transformer)
+            columns = list(columns)
+            if isinstance(transformer, StandardScaler):
+                # sklearn keeps a numeric block in float32 when every input
+                # column is int or float32, as the schema dtypes make them
+                block_dtype = np.result_type(*[NUMERIC_DTYPES.get(c, 'float64') for c in columns])
+                as_float32 = block_dtype == np.float32
+                for i, col in enumerate(columns):
+                    mean = transformer.mean_[i] if transformer.mean_ is not None else 0.0
+                    scale = transformer.scale_[i] if transformer.scale_ is not None else 1.0
+                    self._numeric.append((col, position + i, float(mean), float(scale), as_float32))
+                position += len(columns)
+            elif (isinstance(transformer, OneHotEncoder) and transformer.drop_idx_ is None
+                  and getattr(transformer, 'infrequent_categories_', None) is None):
+                self._categorical_columns.extend(columns)
+                for col, categories in zip(columns, transformer.categories_):
+                    for value in categories:
+                        self._onehot[(col, value)] = position
+                        position += 1
+            else:
+                raise ValueError(f"FastScorer does not support {type(transformer).__name__}")
+        self.n_features = position
+        self._compile_classifier(classifier)
+
+    def _compile_classifier(self, classifier):
+        if isinstance(classifier, LogisticRegression) and len(classifier.classes_) == 2:
+            self._coef = np.ascontiguousarray(classifier.coef_.T)
+            self._intercept = classifier.intercept_.reshape(1, -1)
+            self._churn_raw = self._logistic
+            self._tree_inputs = False
+        elif isinstance(classifier, GradientBoostingClassifier) and classifier.n_trees_per_iteration_ == 1:
+            self._trees = [self._compile_tree(tree.tree_) for tree in classifier.estimators_[:, 0]]
+            self._learning_rate = float(classifier.learning_rate)
+            self._init_raw = float(classifier._raw_predict_init(np.zeros((1, self.n_features)))[0, 0])
+            self._churn_raw = self._boosting
+            self._tree_inputs = True
+        elif isinstance(classifier, RandomForestClassifier) and len(classifier.classes_) == 2:
+            self._trees = []
+            for tree in classifier.estimators_:
+                feature, threshold, left, right, value = self._compile_tree(tree.tree_, column=None)
+                value = [v[1] / (v[0] + v[1]) if (v[0] + v[1]) > 0 else 0.0 for v in value]
+                self._trees.append((feature, threshold, left, right, value))
+            self._churn_raw = self._forest
+            self._tree_inputs = True
+        else:
+            raise ValueError(f"FastScorer does not support {type(classifier).__name__}")
+
+    @staticmethod
+    def _compile_tree(tree, column=0):
+        values = tree.value[:, 0, :] if column is None else tree.value[:, 0, column]
+        return (tree.feature.tolist(), tree.threshold.tolist(),
+                tree.children_left.tolist(), tree.children_right.tolist(), values.tolist())
+
+    # The tree walks are inlined: a function call per tree would cost more
+    # than the walk itself for shallow boosting trees.
+    def _logistic(self, x):
+        # Same (1, n) @ (n, 1) product as LogisticRegression.decision_function
+        # so the BLAS summation order, and hence the result, is identical
+        z = np.array([x]) @ self._coef + self._intercept
+        return float(expit(z[0, 0]))
+
+    def _boosting(self, x):
+        raw = self._init_raw
+        learning_rate = self._learning_rate
+        for feature, threshold, left, right, value in self._trees:
+            node = 0
+            while left[node] != -1:
+                node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+            raw += learning_rate * value[node]
+        return float(expit(raw))
+
+    def _forest(self, x):
+        total = 0.0
+        for feature, threshold, left, right, value in self._trees:
+            node = 0
+            while left[node] != -1:
+                node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+            total += value[node]
+        return total / len(self._trees)
+
+    def transform_one(self, record):
+        # The encoded feature vector for one record, as a list of floats
+        x = [0.0] * self.n_features
+        for col, position, mean, scale, as_float32 in self._numeric:
+            value = record[col]
+            if as_float32:
+                value = _float32(_float32(_float32(value) - mean) / scale)
+            else:
+                value = (float(value) - mean) / scale
+                if self._tree_inputs:
+                    # sklearn trees compare float32 copies of the inputs
+                    value = _float32(value)
+            x[position] = value
+        for col in self._categorical_columns:
+            position = self._onehot.get((col, record[col]))
+            if position is not None:
+                x[position] = 1.0
+        return x
+
+    def predict_proba_one(self, record):
+        # Every compiled classifier yields the probability of classes_[1]
+        p = self._churn_raw(self.transform_one(record))
+        return [1.0 - p, p]
+
+def compile_scorer(pipeline):
+    # Fastest available single-record scorer for a fitted pipeline
+    try:
+        return FastScorer(pipeline)
+    except (ValueError, AttributeError, KeyError):
+        return PipelineScorer(pipeline)
@@ -0,0 +1,296 @@
+import numpy as np
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from schema import CATEGORIES, FEATURE_COLUMNS, NUMERIC_DTYPES, NUMERIC_RANGES, NUMERICAL_FEATURES, records_to_frame
+from scoring import ModelWatcher, churn_class_index, load_serving_model, risk_tier
+from prediction_cache import PredictionCache
+
+# Local HTTP scoring service. Requests that arrive within `batch_window`
+# seconds of each other are scored together in one predict_proba call, which
+# is far cheaper per row than scoring them one at a time.
+#
+#   POST /predict   {"gender": "Male", ...} or {"instances": [{...}, ...]}
+#   GET  /metrics   throughput, batch size and latency counters
+#   GET  /health    status and the version of the model being served
+#
+# Without --model the service follows the registry: activating another
+# version swaps the model between batches, and requests already in a batch
+# finish with the model that batch started on.
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+LATENCY_SAMPLES = 10_000
+
+def validate_records(records):
+    # Cheap per-request check so one bad request cannot fail the whole
+    # micro-batch it would have been scored with
+    if not isinstance(records, list) or not records:
+        raise ValueError("expected a record or a non-empty 'instances' list")
+    for record in records:
+        missing = [c for c in FEATURE_COLUMNS if c not in record]
+        if missing:
+            raise ValueError(f"missing features: {missing}")
+        for col in NUMERICAL_FEATURES:
+            value = record[col]
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"'{col}' must be a number")
+            # Same bounds as apply_schema; they also keep the value inside
+            # the column's compact dtype in records_to_frame. NaN fails every
+            # comparison and infinities are out of range, so neither passes.
+            low, high = NUMERIC_RANGES[col]
+            if not low <= value <= high:
+                raise ValueError(f"'{col}' must be in the range [{low}, {high}]")
+            # records_to_frame would silently truncate 12.7 to 12
+            if NUMERIC_DTYPES[col].startswith('int') and value != int(value):
+                raise ValueError(f"'{col}' must be a whole number")
+        for col, allowed in CATEGORIES.items():
+            if col in record and record[col] not in allowed:
+                raise ValueError(f"'{col}' must be one of {allowed}")
+
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.rows = 0
+        self.batches = 0
+        self.batch_rows = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def snapshot(self):
+        uptime = time.time() - self.started
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            'uptime_sec': round(uptime, 1),
+            'requests': self.requests,
+            'errors': self.errors,
+            'rows_scored': self.rows,
+            'requests_per_sec': round(self.requests / uptime, 1) if uptime else 0.0,
+            'batches': self.batches,
+            'avg_batch_size': round(self.batch_rows / self.batches, 2) if self.batches else 0.0,
+            'latency_ms': {
+                'p50': round(float(np.percentile(latencies, 50)), 3),
+                'p95': round(float(np.percentile(latencies, 95)), 3),
+                'p99': round(float(np.percentile(latencies, 99)), 3),
+                'max': round(float(latencies.max()), 3),
+            },
+        }
+
+class MicroBatcher:
+    # Collects records from concurrent requests and scores them together.
+    # The model runs in a worker thread so the event loop keeps accepting
+    # requests while a batch is being scored. `watcher` supplies the model
+    # for each batch.
+
+    def __init__(self, watcher, metrics, batch_window=0.002, max_batch_size=1024):
+        self.watcher = watcher
+        self.metrics = metrics
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.queue = asyncio.Queue()
+
+    async def score(self, records):
+        # (churn probabilities, version of the model that produced them)
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((records, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.batch_window
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            records = [record for batch, _ in pending for record in batch]
+            try:
+                proba, version = await loop.run_in_executor(None, self._predict, records)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.metrics.batches += 1
+            self.metrics.batch_rows += len(records)
+            offset = 0
+            for batch, future in pending:
+                # A client that disconnected has already cancelled its future
+                if not future.done():
+                    future.set_result((proba[offset:offset + len(batch)], version))
+                offset += len(batch)
+
+    def _predict(self, records):
+        model, version = self.watcher.current_with_version()
+        return model.predict_proba(records_to_frame(records))[:, churn_class_index(model)], version
+
+class ScoringServer:
+    def __init__(self, watcher, batch_window=0.002, max_batch_size=1024, cache=None):
+        self.watcher = watcher
+        self.metrics = Metrics()
+        self.batcher = MicroBatcher(watcher, self.metrics, batch_window, max_batch_size)
+        self.cache = cache
+        self.cache_version = None
+
+    async def handle(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive, enough for JSON clients and load tests
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'request body too large'})
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self.route(method, path, body)
+                await self._respond(writer, status, payload)
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            # Off the event loop, since noticing a new version loads it
+            await asyncio.get_running_loop().run_in_executor(None, self.watcher.current)
+            return 200, {'status': 'ok', 'model_version': self.watcher.version}
+        if method == 'GET' and path == '/metrics':
+            snapshot = self.metrics.snapshot()
+            snapshot['model_reloads'] = self.watcher.reloads
+            if self.cache is not None:
+                snapshot['cache'] = self.cache.stats()
+            return 200, snapshot
+        if method == 'POST' and path == '/predict':
+            return await self.predict(body)
+        return 404, {'error': 'not found'}
+
+    async def predict(self, body):
+        start = time.perf_counter()
+        self.metrics.requests += 1
+        try:
+            payload = json.loads(body)
+            single = 'instances' not in payload
+            records = [payload] if single else payload['instances']
+            validate_records(records)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.metrics.errors += 1
+            return 400, {'error': str(e)}
+
+        try:
+            probs = await self.score(records)
+        except Exception as e:
+            self.metrics.errors += 1
+            return 500, {'error': str(e)}
+
+        self.metrics.rows += len(records)
+        self.metrics.latencies.append(time.perf_counter() - start)
+        predictions = [
+            {'churn_probability': float(p), 'risk_tier': risk_tier(p)}
+            for p in probs
+        ]
+        return 200, predictions[0] if single else {'predictions': predictions}
+
+    async def score(self, records):
+        # Cached records are answered directly; only misses join a micro-batch
+        if self.cache is None:
+            probs, _ = await self.batcher.score(records)
+            return probs
+
+        # The cache holds scores from one model version only and is emptied
+        # as soon as the watcher serves another one
+        if self.watcher.version != self.cache_version:
+            if self.cache_version is not None:
+                self.cache.clear()
+            self.cache_version = self.watcher.version
+
+        keys = [self.cache.key(record) for record in records]
+        probs = [self.cache.get(record, key) for record, key in zip(records, keys)]
+        missing = [i for i, p in enumerate(probs) if p is None]
+        if missing:
+            scored, version = await self.batcher.score([records[i] for i in missing])
+            # A batch scored by another version than the cache holds (it
+            # straddled a model switch) is answered but not cached
+            current = version == self.cache_version
+            for i, p in zip(missing, scored):
+                probs[i] = float(p)
+                if current:
+                    self.cache.put(records[i], probs[i], keys[i])
+        return probs
+
+    async def _respond(self, writer, status, payload):
+        body = json.dumps(payload).encode()
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large', 500: 'Internal Server Error'}[status]
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+    async def watch_model(self):
+        # Checks for a new model version even while every request is a cache
+        # hit and nothing reaches the batcher; off the event loop, since
+        # noticing a new version loads it
+        loop = asyncio.get_running_loop()
+        while True:
+            await loop.run_in_executor(None, self.watcher.current)
+            await asyncio.sleep(self.watcher.check_interval)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        tasks = [asyncio.create_task(self.batcher.run()), asyncio.create_task(self.watch_model())]
+        print(f"Scoring service listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve churn predictions over HTTP with micro-batching")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model', default=None,
+                        help="Serve this model only (default: follow the registry's current version)")
+    parser.add_argument('--batch-window-ms', type=float, default=2.0,
+                        help="How long to wait for more requests before scoring a batch")
+    parser.add_argument('--max-batch-size', type=int, default=1024)
+    parser.add_argument('--cache-size', type=int, default=100_000,
+                        help="Entries in the prediction cache (0 disables it)")
+    args = parser.parse_args()
+
+    cache = PredictionCache(args.cache_size) if args.cache_size > 0 else None
+    watcher = ModelWatcher(load_serving_model, args.model)
+    watcher.current()  # load before listening so a missing model fails at startup
+    server = ScoringServer(watcher, args.batch_window_ms / 1000, args.max_batch_size, cache)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -1,37 +1,25 @@
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, OneHotEncoder, LabelEncoder
+from sklearn.preprocessing import StandardScaler, OneHotEncoder, OrdinalEncoder, LabelEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-import joblib
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.metrics import accuracy_score, classification_report
+from joblib import Parallel, delayed
+import argparse
 import os
+import time
+from dataset import dataset_hash, default_data_path, load_dataset
+from schema import CATEGORIES, CATEGORICAL_FEATURES, NUMERICAL_FEATURES, FEATURE_COLUMNS, TARGET
+from registry import REGISTRY_DIR, ModelRegistry
+from score_store import SCORE_STORE_PATH, build_score_store
+from cross_validation import cross_validate_models, summarize
+from incremental import evaluate, train_out_of_core
+from scoring import load_model
+from tuning import TUNING_RESULTS_PATH, save_trials, successive_halving
 
-def train_models(data_path):
-    print("Loading data...")
-    df = pd.read_csv(data_path)
-    
-    # Drop customerID
-    df = df.drop('customerID', axis=1)
-    
-    # Separate features and target
-    X = df.drop('Churn', axis=1)
-    y = df['Churn']
-    
-    # Encode target
-    le = LabelEncoder()
-    y = le.fit_transform(y) # Yes -> 1, No -> 0
-    
-    # Identify categorical and numerical columns
-    categorical_cols = X.select_dtypes(include=['object']).columns
-    numerical_cols = X.select_dtypes(include=['int64', 'float64']).columns
-    
-    print(f"Categorical columns: {list(categorical_cols)}")
-    print(f"Numerical columns: {list(numerical_cols)}")
-    
+def default_engine():
     # Preprocessing for numerical data
     numeric_transformer = Pipeline(steps=[
         ('scaler', StandardScaler())
@@ -45,19 +33,119 @@ def train_models(data_path):
     # Bundle preprocessing for numerical and categorical data
     preprocessor = ColumnTransformer(
         transformers=[
-            ('num', numeric_transformer, numerical_cols),
-            ('cat', categorical_transformer, categorical_cols)
+            ('num', numeric_transformer, NUMERICAL_FEATURES),
+            ('cat', categorical_transformer, CATEGORICAL_FEATURES)
         ])
     
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
     # Define models
     models = {
         'Logistic Regression': LogisticRegression(max_iter=1000),
         'Random Forest': RandomForestClassifier(n_estimators=100, random_state=42),
         'Gradient Boosting': GradientBoostingClassifier(n_estimators=100, random_state=42)
     }
+    return preprocessor, models
+
+def hist_engine():
+    # Scales to tens of millions of rows: numeric features are binned by the
+    # booster itself (so they pass through unscaled), categoricals become
+    # integer codes the booster splits on natively instead of one-hot
+    # columns, and the fit uses every core through OpenMP. Codes follow the
+    # fixed schema categories; unseen values map to NaN (missing).
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('num', 'passthrough', NUMERICAL_FEATURES),
+            ('cat', OrdinalEncoder(categories=[CATEGORIES[c] for c in CATEGORICAL_FEATURES],
+                                   handle_unknown='use_encoded_value', unknown_value=np.nan),
+             CATEGORICAL_FEATURES)
+        ])
+    categorical_mask = [False] * len(NUMERICAL_FEATURES) + [True] * len(CATEGORICAL_FEATURES)
+    models = {
+        'Hist Gradient Boosting': HistGradientBoostingClassifier(
+            categorical_features=categorical_mask, random_state=42
+        )
+    }
+    return preprocessor, models
+
+ENGINES = {'default': default_engine, 'hist': hist_engine}
+
+def _fit_candidate(name, model, X_train, y_train, X_test, y_test):
+    # Runs in a worker process on the already encoded matrices
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    y_pred = model.predict(X_test)
+    return name, model, y_pred, accuracy_score(y_test, y_pred), fit_seconds
+
+# How much worse than the served model a new out-of-core model may do on the
+# hold-out rows and still be activated
+MAX_ACCURACY_DROP = 0.005
+MAX_LOG_LOSS_INCREASE = 0.01
+
+def holds_up_to_current(metrics, data_path, chunk_size=100_000, registry_root=REGISTRY_DIR):
+    # Scores the current registry version on the same hold-out rows as the
+    # new model. Its own training split may overlap them, so the comparison
+    # errs on the side of keeping it.
+    current = ModelRegistry(registry_root).current_path()
+    if current is None:
+        return True
+    baseline = evaluate(load_model(current), data_path, chunk_size)
+    print(f"Current model on the same rows: accuracy {baseline['accuracy']:.4f}, "
+          f"log loss {baseline['log_loss']:.4f}")
+    return (metrics['accuracy'] >= baseline['accuracy'] - MAX_ACCURACY_DROP
+            and metrics['log_loss'] <= baseline['log_loss'] + MAX_LOG_LOSS_INCREASE)
+
+def save_model(model, data_path, metrics=None, target_classes=CATEGORIES[TARGET], registry_root=REGISTRY_DIR,
+               activate=True):
+    # Published to the registry as a versioned artifact directory: the
+    # pipeline plus metadata (schema, class labels, metrics, data hash) and
+    # memory-mappable classifier arrays
+    registry = ModelRegistry(registry_root)
+    metadata = registry.publish(model, metrics=metrics,
+                                data_hash=dataset_hash(data_path, FEATURE_COLUMNS + [TARGET]),
+                                target_classes=target_classes, activate=False)
+    version = metadata['model_version']
+    print(f"Best model saved to {registry.version_path(version)} (version {version})")
+    if not activate:
+        # The score store belongs to the served model, so it is left alone
+        print(f"Model {version} was not activated; run `registry.py activate {version}` to serve it anyway")
+        return
+
+    # Score the whole customer base once so the dashboard can look known
+    # customers up instead of scoring them live
+    print("\nBuilding score store...")
+    rows = build_score_store(model, data_path, SCORE_STORE_PATH, version)
+    print(f"{rows:,} scores from model {version} saved to {SCORE_STORE_PATH}")
+
+    # Activated last, so the dashboard and scoring service switch over to a
+    # model whose score store is already in place
+    registry.activate(version)
+    print(f"Model {version} is now the current version")
+
+def train_models(data_path, n_jobs=-1, tune=False, time_budget=None, cv=None, engine='default'):
+    print("Loading data...")
+    df = load_dataset(data_path, columns=FEATURE_COLUMNS + [TARGET])
+    
+    # Separate features and target
+    X = df[FEATURE_COLUMNS]
+    y = df[TARGET]
+    
+    # Encode target
+    le = LabelEncoder()
+    y = le.fit_transform(y) # Yes -> 1, No -> 0
+    
+    # Categorical and numerical columns come from the shared schema
+    categorical_cols = CATEGORICAL_FEATURES
+    numerical_cols = NUMERICAL_FEATURES
+    
+    print(f"Categorical columns: {categorical_cols}")
+    print(f"Numerical columns: {numerical_cols}")
+    print(f"In-memory size: {X.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+    
+    # Split data
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    
+    # Preprocessing and candidate models for the chosen engine
+    preprocessor, models = ENGINES[engine]()
     
     best_model = None
     best_score = 0
@@ -65,40 +153,97 @@ def train_models(data_path):
     
     results = {}
     
+    # Every candidate shares the same preprocessing, so fit it once and hand
+    # the encoded matrices to the workers (joblib memory-maps large arrays
+    # instead of copying them into each process)
+    print("\nEncoding features...")
+    start = time.perf_counter()
+    X_train_enc = preprocessor.fit_transform(X_train)
+    X_test_enc = preprocessor.transform(X_test)
+    print(f"Preprocessing fitted in {time.perf_counter() - start:.1f}s, {X_train_enc.shape[1]} encoded features")
+    
+    if tune:
+        # Replace the fixed defaults with the best settings a budgeted
+        # successive-halving search finds on the training split
+        print("\nTuning hyperparameters...")
+        start = time.perf_counter()
+        best_params, trials = successive_halving(models, X_train_enc, y_train,
+                                                 time_budget=time_budget, n_jobs=n_jobs)
+        save_trials(trials, TUNING_RESULTS_PATH)
+        print(f"{len(trials)} trials in {time.perf_counter() - start:.1f}s, saved to {TUNING_RESULTS_PATH}")
+        for name, params in best_params.items():
+            models[name].set_params(**params)
+            print(f"  {name}: {params}")
+    
+    # Optionally choose the winner by k-fold accuracy on the training split
+    # rather than by a single test-split score
+    cv_scores = None
+    if cv:
+        print(f"\n{cv}-fold cross-validation...")
+        cv_summary = summarize(cross_validate_models(models, preprocessor, X_train, y_train, cv, n_jobs))
+        print(cv_summary.round(4).to_string())
+        cv_scores = cv_summary[('accuracy', 'mean')].to_dict()
+    
     print("\nTraining models...")
-    for name, model in models.items():
-        # Create pipeline
-        clf = Pipeline(steps=[('preprocessor', preprocessor),
-                              ('classifier', model)])
-        
-        clf.fit(X_train, y_train)
-        y_pred = clf.predict(X_test)
-        
-        score = accuracy_score(y_test, y_pred)
+    start = time.perf_counter()
+    fitted = Parallel(n_jobs=min(n_jobs if n_jobs > 0 else os.cpu_count(), len(models)))(
+        delayed(_fit_candidate)(name, model, X_train_enc, y_train, X_test_enc, y_test)
+        for name, model in models.items()
+    )
+    print(f"All candidates trained in {time.perf_counter() - start:.1f}s")
+    
+    for name, model, y_pred, score, fit_seconds in fitted:
         results[name] = score
         
-        print(f"\n{name} Accuracy: {score:.4f}")
+        print(f"\n{name} Accuracy: {score:.4f} (fit {fit_seconds:.1f}s)")
         print(classification_report(y_test, y_pred))
         
-        if score > best_score:
-            best_score = score
-            best_model = clf
+        selection_score = score if cv_scores is None else cv_scores[name]
+        if selection_score > best_score:
+            best_score = selection_score
+            best_model = Pipeline(steps=[('preprocessor', preprocessor),
+                                         ('classifier', model)])
             best_model_name = name
             
-    print(f"\nBest model: {best_model_name} with accuracy: {best_score:.4f}")
+    criterion = "accuracy" if cv_scores is None else f"{cv}-fold CV accuracy"
+    print(f"\nBest model: {best_model_name} with {criterion}: {best_score:.4f}")
     
-    # Save the best model
-    model_path = 'models/best_churn_model.pkl'
-    joblib.dump(best_model, model_path)
-    print(f"Best model saved to {model_path}")
+    metrics = {
+        'selection': criterion,
+        'best_model': best_model_name,
+        'best_score': best_score,
+        'test_accuracy': results,
+    }
+    save_model(best_model, data_path, metrics, list(le.classes_))
 
-    # Also save the label encoder logic if needed, but for binary classification (0/1) it's usually standard.
-    # However, we might want to know what 1 means. 1 is usually the second class in sorted order (No, Yes -> Yes=1).
-    # Let's verify and print it.
+    # The label encoder mapping (No -> 0, Yes -> 1) is also stored in the
+    # artifact metadata as target.labels
     print(f"Target classes: {le.classes_}")
     
 if __name__ == "__main__":
-    if os.path.exists('data/telecom_churn.csv'):
-        train_models('data/telecom_churn.csv')
+    parser = argparse.ArgumentParser(description="Train the churn candidates and save the best pipeline")
+    parser.add_argument('--data', default=default_data_path())
+    parser.add_argument('--jobs', type=int, default=-1, help="Worker processes (-1 uses every core)")
+    parser.add_argument('--tune', action='store_true',
+                        help="Search each model's hyperparameters with successive halving first")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="Seconds the hyperparameter search may spend")
+    parser.add_argument('--engine', choices=list(ENGINES), default='default',
+                        help="'hist' trains a histogram gradient booster on native categoricals, for large data")
+    parser.add_argument('--out-of-core', action='store_true',
+                        help="Stream the data in chunks and train an incremental SGD model; memory stays bounded")
+    parser.add_argument('--epochs', type=int, default=5, help="Passes over the data in --out-of-core mode")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="Rows per chunk in --out-of-core mode")
+    parser.add_argument('--cv', type=int, default=None,
+                        help="Select the best model by k-fold cross-validation with this many folds")
+    args = parser.parse_args()
+
+    data_path = args.data
+    if os.path.exists(data_path) and args.out_of_core:
+        model, metrics = train_out_of_core(data_path, args.epochs, args.chunk_size)
+        save_model(model, data_path, metrics,
+                   activate=holds_up_to_current(metrics, data_path, args.chunk_size))
+    elif os.path.exists(data_path):
+        train_models(data_path, args.jobs, args.tune, args.time_budget, args.cv, args.engine)
     else:
         print("Data file not found!")
@@ -0,0 +1,134 @@
+import numpy as np
+import json
+import time
+from joblib import Parallel, delayed
+from scipy.stats import loguniform, randint, uniform
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterSampler, train_test_split
+
+TUNING_RESULTS_PATH = 'models/tuning_trials.json'
+
+# Hyperparameter distributions sampled for each candidate in train_model
+SEARCH_SPACES = {
+    'Logistic Regression': {
+        'C': loguniform(1e-3, 1e2),
+    },
+    'Random Forest': {
+        'n_estimators': randint(50, 400),
+        'max_depth': [None, 8, 12, 16, 24],
+        'min_samples_leaf': randint(1, 20),
+        'max_features': ['sqrt', 0.3, 0.5],
+    },
+    'Gradient Boosting': {
+        'n_estimators': randint(50, 400),
+        'learning_rate': loguniform(0.01, 0.3),
+        'max_depth': randint(2, 6),
+        'subsample': uniform(0.6, 0.4),
+    },
+    'Hist Gradient Boosting': {
+        'learning_rate': loguniform(0.02, 0.3),
+        'max_iter': randint(100, 500),
+        'max_leaf_nodes': randint(15, 127),
+        'min_samples_leaf': randint(10, 200),
+        'l2_regularization': loguniform(1e-4, 1.0),
+    },
+}
+
+def _run_trial(trial_id, name, model, params, X_train, y_train, X_val, y_val):
+    model = clone(model).set_params(**params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    score = accuracy_score(y_val, model.predict(X_val))
+    return trial_id, score, fit_seconds
+
+def successive_halving(models, X, y, n_configs=8, factor=3, min_samples=2_000,
+                       time_budget=None, n_jobs=-1, random_state=42):
+    # Samples n_configs settings per model from SEARCH_SPACES and runs a
+    # separate halving for each model, with the rungs of all models fitted
+    # together in one parallel pass. Each rung fits every surviving config on
+    # a larger slice of the training data and keeps the best 1/factor of each
+    # model's own configs by validation accuracy; a model is done once one
+    # config is left. The slices grow by x factor and are sized, like
+    # scikit-learn's min_resources='exhaust', so that the last elimination
+    # runs on all the rows (never fewer than min_samples in the first rung).
+    # Models are only compared later, on the full data. A rung is started
+    # only if the previous one suggests it fits in what is left of
+    # time_budget (seconds). Returns the best params per model, from the
+    # highest rung it reached, and a record of every trial.
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X, y, test_size=0.2, random_state=random_state, stratify=y
+    )
+    order = np.random.default_rng(random_state).permutation(len(y_fit))
+
+    configs = []
+    # Models without a search space keep their defaults; there is nothing to race
+    best_params = {name: {} for name in models if name not in SEARCH_SPACES}
+    for name in models:
+        if name in SEARCH_SPACES:
+            sampler = ParameterSampler(SEARCH_SPACES[name], n_configs, random_state=random_state)
+            # numpy scalars become plain Python so trials serialize to JSON
+            configs.extend((name, {k: getattr(v, 'item', lambda: v)() for k, v in params.items()})
+                           for params in sampler)
+
+    # Rungs until every model is down to one config
+    n_rungs = 0
+    remaining_configs = max((sum(1 for n, _ in configs if n == name) for name in models), default=1)
+    while remaining_configs > 1:
+        remaining_configs = max(1, remaining_configs // factor)
+        n_rungs += 1
+    first_rung = min(len(order), max(min_samples, len(order) // factor ** max(n_rungs - 1, 0)))
+    rung_sizes = [min(len(order), first_rung * factor ** rung) for rung in range(n_rungs)]
+    if rung_sizes:
+        rung_sizes[-1] = len(order)
+
+    trials = []
+    survivors = list(range(len(configs)))
+    last_rung_seconds = None
+    for rung, n_samples in enumerate(rung_sizes):
+        if not survivors:
+            break
+        remaining = None if deadline is None else deadline - time.perf_counter()
+        if remaining is not None and rung > 0 and (remaining <= 0 or last_rung_seconds > remaining):
+            print(f"  Time budget reached before rung {rung}")
+            break
+
+        print(f"  Rung {rung}: {len(survivors)} configs on {n_samples:,} rows")
+        rows = order[:n_samples]
+        X_rung = X_fit[rows]
+        y_rung = y_fit[rows]
+        start = time.perf_counter()
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_run_trial)(i, configs[i][0], models[configs[i][0]], configs[i][1],
+                                X_rung, y_rung, X_val, y_val)
+            for i in survivors
+        )
+        last_rung_seconds = time.perf_counter() - start
+
+        for i, score, fit_seconds in results:
+            name, params = configs[i]
+            trials.append({
+                'model': name,
+                'params': params,
+                'rung': rung,
+                'n_samples': n_samples,
+                'score': score,
+                'fit_seconds': fit_seconds,
+            })
+
+        survivors = []
+        for name in models:
+            ranked = sorted((r for r in results if configs[r[0]][0] == name), key=lambda r: r[1], reverse=True)
+            kept = [i for i, _, _ in ranked[:max(1, len(ranked) // factor)]]
+            if len(kept) > 1:
+                survivors.extend(kept)
+
+    for trial in sorted(trials, key=lambda t: (t['rung'], t['score'])):
+        best_params[trial['model']] = trial['params']
+    return best_params, trials
+
+def save_trials(trials, path=TUNING_RESULTS_PATH):
+    with open(path, 'w') as f:
+        json.dump(trials, f, indent=2)
@@ -0,0 +1,47 @@
+import os
+import pytest
+from scoring import ModelWatcher
+
+def _write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+    # Distinct mtimes even on coarse filesystem clocks
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + len(text) * 1_000_000_000))
+
+def test_failed_reload_keeps_the_previous_model(tmp_path, capsys):
+    path = str(tmp_path / 'model.pkl')
+    _write(path, 'v1')
+    failures = []
+
+    def load(p):
+        with open(p) as f:
+            text = f.read()
+        if text == 'broken' and not failures:
+            failures.append(text)
+            raise EOFError('truncated model')
+        return text
+
+    watcher = ModelWatcher(load, path, check_interval=0)
+    assert watcher.current() == 'v1'
+    version = watcher.version
+
+    _write(path, 'broken')
+    assert watcher.current() == 'v1'
+    assert watcher.version == version
+    assert 'truncated model' in capsys.readouterr().out
+
+    # The stamp was left alone, so the next check retries the same file
+    assert watcher.current() == 'broken'
+    assert watcher.version != version
+    assert watcher.reloads == 1
+
+def test_first_load_failure_is_raised(tmp_path):
+    path = str(tmp_path / 'model.pkl')
+    _write(path, 'v1')
+
+    def load(p):
+        raise EOFError('truncated model')
+
+    with pytest.raises(EOFError):
+        ModelWatcher(load, path, check_interval=0).current()
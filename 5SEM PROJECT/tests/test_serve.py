@@ -0,0 +1,114 @@
+import asyncio
+import json
+import math
+import numpy as np
+import pytest
+from schema import records_to_frame
+from prediction_cache import PredictionCache
+from serve import ScoringServer, validate_records
+
+RECORD = {
+    'gender': 'Female', 'SeniorCitizen': 0, 'Partner': 'Yes', 'Dependents': 'No',
+    'tenure': 12, 'PhoneService': 'Yes', 'MultipleLines': 'No',
+    'InternetService': 'Fiber optic', 'OnlineSecurity': 'No', 'OnlineBackup': 'Yes',
+    'DeviceProtection': 'No', 'TechSupport': 'No', 'StreamingTV': 'Yes',
+    'StreamingMovies': 'No', 'Contract': 'Month-to-month', 'PaperlessBilling': 'Yes',
+    'PaymentMethod': 'Electronic check', 'MonthlyCharges': 80.5, 'TotalCharges': 966.0,
+}
+
+class StubModel:
+    # Builds the same frame the real model would, so out-of-range values
+    # fail the way they would in production
+    classes_ = np.array([0, 1])
+
+    def __init__(self, p=0.25):
+        self.p = p
+
+    def predict_proba(self, X):
+        X = records_to_frame(X.to_dict('records'))
+        p = np.full(len(X), self.p)
+        return np.column_stack([1 - p, p])
+
+class StubWatcher:
+    reloads = 0
+    check_interval = 0.01
+
+    def __init__(self):
+        self.version = 'v1'
+        self.models = {'v1': StubModel(0.25), 'v2': StubModel(0.75)}
+
+    def current(self):
+        return self.models[self.version]
+
+    def current_with_version(self):
+        return self.models[self.version], self.version
+
+@pytest.mark.parametrize('col, value', [
+    ('SeniorCitizen', 300),
+    ('tenure', 40_000),
+    ('tenure', -5),
+    ('MonthlyCharges', math.nan),
+    ('TotalCharges', math.inf),
+    ('tenure', 2 ** 64),
+    ('SeniorCitizen', 0.7),
+    ('tenure', 12.7),
+])
+def test_validate_records_rejects_out_of_range(col, value):
+    with pytest.raises(ValueError):
+        validate_records([dict(RECORD, **{col: value})])
+
+def test_validate_records_accepts_whole_floats():
+    validate_records([dict(RECORD, tenure=12.0, SeniorCitizen=1.0)])
+
+def test_bad_request_does_not_fail_its_batch():
+    async def run():
+        server = ScoringServer(StubWatcher(), batch_window=0.05)
+        batcher = asyncio.create_task(server.batcher.run())
+        try:
+            bad = json.dumps(dict(RECORD, SeniorCitizen=300)).encode()
+            good = json.dumps(RECORD).encode()
+            return await asyncio.wait_for(asyncio.gather(server.predict(bad), server.predict(good)), 5)
+        finally:
+            batcher.cancel()
+
+    (bad_status, _), (good_status, good) = asyncio.run(run())
+    assert bad_status == 400
+    assert good_status == 200
+    assert good['churn_probability'] == pytest.approx(0.25)
+
+def test_cancelled_client_does_not_stop_the_batcher():
+    async def run():
+        server = ScoringServer(StubWatcher(), batch_window=0.05)
+        batcher = asyncio.create_task(server.batcher.run())
+        try:
+            abandoned = asyncio.create_task(server.batcher.score([RECORD]))
+            await asyncio.sleep(0)
+            abandoned.cancel()
+            status, payload = await asyncio.wait_for(server.predict(json.dumps(RECORD).encode()), 5)
+            assert not batcher.done()
+            return status, payload
+        finally:
+            batcher.cancel()
+
+    status, _ = asyncio.run(run())
+    assert status == 200
+
+def test_cache_is_emptied_when_the_model_changes():
+    async def run():
+        watcher = StubWatcher()
+        server = ScoringServer(watcher, batch_window=0.001, cache=PredictionCache(100))
+        batcher = asyncio.create_task(server.batcher.run())
+        try:
+            body = json.dumps(RECORD).encode()
+            first = await asyncio.wait_for(server.predict(body), 5)
+            cached = await asyncio.wait_for(server.predict(body), 5)
+            watcher.version = 'v2'
+            switched = await asyncio.wait_for(server.predict(body), 5)
+            return [payload['churn_probability'] for _, payload in (first, cached, switched)], server.cache.stats()
+        finally:
+            batcher.cancel()
+
+    probs, stats = asyncio.run(run())
+    assert probs == pytest.approx([0.25, 0.25, 0.75])
+    assert stats['hits'] == 1
+    assert stats['invalidations'] == 1